@@ -10,14 +10,20 @@ import os
 import torch
 import numpy as np
 from datetime import datetime
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from typing import List, Dict, Tuple, Optional
 import logging
 
+import telemetry
+from profiler import profiled
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Query embeddings kept in memory for the most recent samples (float32, ~1.5 KB each)
+MAX_QUERY_EMBEDDINGS = 1000
+
 
 class RewardModel:
     """Automated reward model for evaluating responses"""
@@ -131,8 +137,8 @@ class RewardModel:
         
         return min(engagement_score, 1.0)
     
-    def compute_reward(self, question: str, response: str, context: str = "") -> float:
-        """Compute overall reward score"""
+    def score(self, question: str, response: str, context: str = "") -> Tuple[float, Dict[str, float]]:
+        """Reward in [-1, 1] and per-criterion scores, without recording history"""
         
         scores = {
             'relevance': self.evaluate_relevance(question, response, context),
@@ -148,6 +154,13 @@ class RewardModel:
         # Normalize to [-1, 1] range
         reward = (reward * 2) - 1
         
+        return reward, scores
+    
+    def compute_reward(self, question: str, response: str, context: str = "") -> float:
+        """Compute overall reward score"""
+        
+        reward, scores = self.score(question, response, context)
+        
         # Store performance
         self.performance_history.append({
             'timestamp': datetime.now().isoformat(),
@@ -290,6 +303,9 @@ class AutomatedRLHFSystem:
         self.training_data = self.load_training_data()
         self.batch_buffer = []
         
+        # Sample index -> float32 query embedding, bounded (never persisted)
+        self.query_embeddings = OrderedDict()
+        
         logger.info("✓ Automated RLHF System initialized")
         logger.info(f"✓ Training samples loaded: {len(self.training_data)}")
     
@@ -302,20 +318,25 @@ class AutomatedRLHFSystem:
     
     def save_training_data(self):
         """Save training data"""
-        with open(self.feedback_file, 'w', encoding='utf-8') as f:
-            json.dump(self.training_data, f, indent=2, ensure_ascii=False)
+        with telemetry.span('persist'):
+            with open(self.feedback_file, 'w', encoding='utf-8') as f:
+                json.dump(self.training_data, f, indent=2, ensure_ascii=False)
     
+    @profiled("process_interaction")
     def process_interaction(
         self,
         question: str,
         response: str,
         context: str = "",
-        auto_train: bool = True
+        auto_train: bool = True,
+        query_embedding: Optional[List[float]] = None,
+        context_ids: Optional[List[str]] = None
     ) -> Dict:
         """Process a single interaction and optionally train"""
         
         # Compute reward automatically
-        reward = self.reward_model.compute_reward(question, response, context)
+        with telemetry.span('reward'):
+            reward = self.reward_model.compute_reward(question, response, context)
         
         # Create training sample
         sample = {
@@ -325,9 +346,16 @@ class AutomatedRLHFSystem:
             'context': context,
             'reward': reward,
             'response_length': len(response),
-            'response_format': self._detect_format(response)
+            'response_format': self._detect_format(response),
+            'context_ids': list(context_ids or [])
         }
         
+        # Keep the turn's query embedding in a bounded side table (not in the sample)
+        if query_embedding is not None:
+            self.query_embeddings[len(self.training_data)] = np.asarray(query_embedding, dtype=np.float32)
+            while len(self.query_embeddings) > MAX_QUERY_EMBEDDINGS:
+                self.query_embeddings.popitem(last=False)
+        
         # Add to buffer
         self.batch_buffer.append(sample)
         self.training_data.append(sample)
@@ -364,6 +392,39 @@ class AutomatedRLHFSystem:
         if len(self.training_data) % 50 == 0:
             self.save_training_data()
     
+    def rescore(self, chunk_store) -> Dict[str, float]:
+        """
+        Recompute rewards for stored samples, rebuilding their context from
+        the chunk store by id (no re-chunking or retrieval needed)
+        
+        Args:
+            chunk_store: chunk_store.ChunkStore holding the current chunks
+        """
+        old_rewards, new_rewards = [], []
+        
+        for sample in self.training_data:
+            chunks = chunk_store.get_many(sample.get('context_ids', []))
+            context = "\n\n---\n\n".join(
+                f"[Source: {c['source']}]\n{c['content']}" for c in chunks
+            ) if chunks else sample.get('context', '')
+            
+            old_rewards.append(sample['reward'])
+            sample['reward'] = self.reward_model.compute_reward(
+                sample['question'], sample['response'], context
+            )
+            new_rewards.append(sample['reward'])
+        
+        self.save_training_data()
+        
+        summary = {
+            'samples': len(new_rewards),
+            'old_mean_reward': float(np.mean(old_rewards)) if old_rewards else 0.0,
+            'new_mean_reward': float(np.mean(new_rewards)) if new_rewards else 0.0
+        }
+        logger.info(f"Re-scored {summary['samples']} samples - mean reward "
+                    f"{summary['old_mean_reward']:.3f} -> {summary['new_mean_reward']:.3f}")
+        return summary
+    
     def _detect_format(self, response: str) -> str:
         """Detect response format"""
         if '•' in response or '*' in response or response.count('-') > 3:
@@ -3,33 +3,134 @@ vectordb_store.py
 Pure Vector Database Storage - Imports chunks from chunks_dataset.py
 """
 
+import json
+import logging
+import os
+import threading
 import chromadb
 from chromadb.utils import embedding_functions
 from chunks_dataset import chunk_markdown_files
 
+
+# HNSW index profiles, applied when a collection is first created
+INDEX_PROFILES = {
+    "default": {},  # Chroma defaults (l2, M=16, construction_ef=100, search_ef=10)
+    "fast": {
+        "hnsw:space": "cosine",
+        "hnsw:M": 8,
+        "hnsw:construction_ef": 64,
+        "hnsw:search_ef": 16
+    },
+    "balanced": {
+        "hnsw:space": "cosine",
+        "hnsw:M": 16,
+        "hnsw:construction_ef": 128,
+        "hnsw:search_ef": 64
+    },
+    "accurate": {
+        "hnsw:space": "cosine",
+        "hnsw:M": 32,
+        "hnsw:construction_ef": 256,
+        "hnsw:search_ef": 128
+    }
+}
+
+
+logger = logging.getLogger(__name__)
+
+# One client per storage path: Chroma refuses a second client on the same path with
+# different settings, so every store in the process goes through get_client
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(persist_directory="./chroma_db", settings=None):
+    """
+    Shared PersistentClient for a path
+
+    Args:
+        persist_directory: ChromaDB storage path
+        settings: chromadb Settings; they only take effect for the first caller
+                  on a path (a later caller asking for different settings gets
+                  the existing client and a warning)
+    """
+    path = os.path.abspath(persist_directory)
+    with _clients_lock:
+        cached = _clients.get(path)
+        if cached is None:
+            if settings is not None:
+                client = chromadb.PersistentClient(path=persist_directory, settings=settings)
+            else:
+                client = chromadb.PersistentClient(path=persist_directory)
+            _clients[path] = (client, settings)
+            return client
+
+        client, opened_with = cached
+        if settings is not None and settings != opened_with:
+            logger.warning(
+                f"Chroma client for {persist_directory} is already open with settings "
+                f"{opened_with!r}; requested {settings!r} are ignored "
+                f"(create this store before any other on the same path)"
+            )
+        return client
+
+
+def load_embedding_function(model_name="all-MiniLM-L6-v2"):
+    """Load the sentence-transformers embedding function"""
+    return embedding_functions.SentenceTransformerEmbeddingFunction(
+        model_name=model_name
+    )
+
+
 class VectorDBStore:
-    def __init__(self, persist_directory="./chroma_db"):
-        """Initialize ChromaDB with embeddings"""
+    def __init__(self, persist_directory="./chroma_db", collection_name="chatbot_knowledge",
+                 client=None, embedding_function=None, index_profile="default", create=True):
+        """
+        Initialize ChromaDB with embeddings
+        
+        Args:
+            persist_directory: ChromaDB storage path
+            collection_name: Collection holding the knowledge chunks
+            client: Existing Chroma client to share (e.g. across tenants)
+            embedding_function: Existing embedding function to share
+            index_profile: Name in INDEX_PROFILES or a dict of hnsw:* settings
+                           (only takes effect when the collection is created)
+            create: Create the collection if missing (False raises instead)
+        """
+        
+        self.persist_directory = persist_directory
+        self.collection_name = collection_name
         
         # Create ChromaDB client
-        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.client = client or get_client(persist_directory)
         
         # Setup embedding function
-        self.embedding_function = embedding_functions.SentenceTransformerEmbeddingFunction(
-            model_name="all-MiniLM-L6-v2"
-        )
+        self.embedding_function = embedding_function or load_embedding_function()
+        
+        # HNSW settings for new collections
+        if isinstance(index_profile, dict):
+            index_metadata = dict(index_profile)
+        else:
+            index_metadata = dict(INDEX_PROFILES[index_profile])
         
         # Create collection (note: parameter is embedding_function, not embedding_functions)
-        self.collection = self.client.get_or_create_collection(
-            name="chatbot_knowledge",
-            embedding_function=self.embedding_function
-        )
+        if create:
+            self.collection = self.client.get_or_create_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function,
+                metadata=index_metadata or None
+            )
+        else:
+            self.collection = self.client.get_collection(
+                name=self.collection_name,
+                embedding_function=self.embedding_function
+            )
         
-        print(f"✓ VectorDB initialized: {persist_directory}")
+        print(f"✓ VectorDB initialized: {persist_directory} [{collection_name}]")
         print(f"✓ Embedding model: all-MiniLM-L6-v2")
     
-    def store_chunks(self, chunks):
-        """Store chunks in VectorDB with embeddings"""
+    def store_chunks(self, chunks, upsert=False):
+        """Store chunks in VectorDB with embeddings (upsert=True replaces existing ids)"""
         
         documents = []
         metadatas = []
@@ -43,12 +144,18 @@ class VectorDBStore:
             documents.append(content)
             metadatas.append({
                 'source': source,
-                'chunk_index': chunk_id
+                'chunk_index': chunk_id,
+                'doc_type': chunk.get('doc_type', 'general'),
+                'heading_path': chunk.get('heading_path', '')
             })
             ids.append(f"{source}_{chunk_id}")
         
+        if not ids:
+            return 0
+        
         # Add to ChromaDB
-        self.collection.add(
+        write = self.collection.upsert if upsert else self.collection.add
+        write(
             documents=documents,
             metadatas=metadatas,
             ids=ids
@@ -57,15 +164,114 @@ class VectorDBStore:
         print(f"✓ Stored {len(documents)} chunks in VectorDB")
         return len(documents)
     
-    def query(self, question, n_results=3):
-        """Query VectorDB for relevant chunks"""
+    def query(self, question, n_results=3, query_embedding=None, where=None):
+        """
+        Query VectorDB for relevant chunks
+        
+        Args:
+            question: Question text
+            n_results: Number of chunks to return
+            query_embedding: Precomputed embedding of the question (skips re-embedding)
+            where: Optional Chroma metadata filter, e.g. {'doc_type': 'pricing'}
         
+        Returns:
+            Chroma results, plus 'query_embedding' so callers can reuse it
+        """
+        if query_embedding is None:
+            query_embedding = self.embed([question])[0]
+        
+        kwargs = {'where': where} if where else {}
         results = self.collection.query(
-            query_texts=[question],
-            n_results=n_results
+            query_embeddings=[query_embedding],
+            n_results=n_results,
+            **kwargs
         )
+        results['query_embedding'] = query_embedding
         return results
     
+    def replace_source(self, source, chunks):
+        """
+        Swap all chunks of one source file for a new set
+        
+        New chunks are upserted before stale ids are deleted, so queries
+        never see the source missing.
+        """
+        existing = set(self.collection.get(where={'source': source}, include=[])['ids'])
+        self.store_chunks(chunks, upsert=True)
+        
+        new_ids = {f"{source}_{chunk.get('chunk_id', 0)}" for chunk in chunks}
+        stale = sorted(existing - new_ids)
+        if stale:
+            self.collection.delete(ids=stale)
+        return len(new_ids), len(stale)
+    
+    def delete_source(self, source):
+        """Remove every chunk of one source file"""
+        self.collection.delete(where={'source': source})
+    
+    def embed(self, texts):
+        """Embed a list of texts in one batched forward pass"""
+        embeddings = self.embedding_function(list(texts))
+        return [[float(x) for x in emb] for emb in embeddings]
+    
+    def query_batch(self, questions, n_results=3, where=None, batch_size=256):
+        """
+        Query VectorDB for many questions at once
+        
+        Args:
+            questions: List of question strings
+            n_results: Number of chunks per question
+            where: Optional metadata filter - one dict for all questions,
+                   or a list with one dict (or None) per question
+            batch_size: Questions per embedding/Chroma call
+        
+        Returns:
+            List of result dicts (ids/documents/metadatas/distances),
+            aligned with the input questions
+        """
+        questions = list(questions)
+        if where is None or isinstance(where, dict):
+            filters = [where] * len(questions)
+        else:
+            filters = list(where)
+            if len(filters) != len(questions):
+                raise ValueError("where must have one entry per question")
+        
+        # Group questions sharing the same filter - Chroma takes one filter per call
+        groups = {}
+        for i, query_filter in enumerate(filters):
+            key = json.dumps(query_filter, sort_keys=True)
+            groups.setdefault(key, []).append(i)
+        
+        results = [None] * len(questions)
+        for key, indices in groups.items():
+            query_filter = json.loads(key)
+            for start in range(0, len(indices), batch_size):
+                batch = indices[start:start + batch_size]
+                embeddings = self.embed([questions[i] for i in batch])
+                
+                kwargs = {'where': query_filter} if query_filter else {}
+                batch_results = self.collection.query(
+                    query_embeddings=embeddings,
+                    n_results=n_results,
+                    **kwargs
+                )
+                
+                for j, i in enumerate(batch):
+                    results[i] = {
+                        'ids': batch_results['ids'][j],
+                        'documents': batch_results['documents'][j],
+                        'metadatas': batch_results['metadatas'][j],
+                        'distances': batch_results['distances'][j]
+                    }
+        
+        return results
+    
+    def has_metadata_field(self, field):
+        """Whether stored chunks carry a metadata field (checks a sample chunk)"""
+        sample = self.collection.get(limit=1, include=['metadatas'])
+        return bool(sample['metadatas']) and field in (sample['metadatas'][0] or {})
+    
     def get_stats(self):
         """Get collection statistics"""
         count = self.collection.count()
@@ -79,10 +285,16 @@ if __name__ == "__main__":
     print("VECTOR DATABASE STORAGE")
     print("="*80 + "\n")
     
-    # Step 1: Import chunks from chunks_dataset.py
+    # Step 1: Import chunks (from the chunk store if chunks_dataset.py already ran)
     print("Loading chunks from dataset...")
     dataset_path = "./chatbot_dataset"
-    chunks = chunk_markdown_files(dataset_path)
+    if os.path.exists("chunks.fbcs"):
+        from chunk_store import ChunkStore
+        with ChunkStore("chunks.fbcs") as store:
+            chunks = list(store)
+        print(f"✓ {len(chunks)} chunks loaded from chunks.fbcs")
+    else:
+        chunks = chunk_markdown_files(dataset_path, splitter="markdown", max_tokens=256)
     
     # Step 2: Initialize VectorDB
     print("\nInitializing VectorDB...")
@@ -110,6 +322,21 @@ if __name__ == "__main__":
         print(f"[{i+1}] {meta['source']}")
         print(f"    {doc[:150]}...\n")
     
+    # Step 6: Batch query
+    print("="*80)
+    print("BATCH QUERY")
     print("="*80)
+    
+    batch_questions = [
+        "How much does the Professional plan cost?",
+        "Do you integrate with Salesforce?",
+        "Is my data secure?"
+    ]
+    batch_results = vectordb.query_batch(batch_questions, n_results=1)
+    
+    for question, result in zip(batch_questions, batch_results):
+        print(f"\n{question} -> {result['metadatas'][0]['source']}")
+    
+    print("\n" + "="*80)
     print("✅ COMPLETE!")
     print("="*80)
\ No newline at end of file
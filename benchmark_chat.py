@@ -0,0 +1,277 @@
+"""
+benchmark_chat.py
+End-to-End Chat Benchmark - Replays FAQ questions through the chatbot against a
+stub LLM and reports per-stage latency percentiles, throughput and peak RSS
+
+    python benchmark_chat.py --sessions 1 4 16 --mode stream --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from chunks_dataset import extract_faq_questions
+from chatbot_llm import FlowboticsChatbotOptimized
+from fake_llm import FakeLLMClient, start_server
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+STAGES = ['intent_ms', 'embed_ms', 'retrieval_ms', 'vector_search_ms', 'prompt_build_ms', 'ttft_ms',
+          'llm_ms', 'rlhf_ms', 'reward_ms', 'persist_ms', 'total_ms']
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process (None where unsupported)"""
+    if RESOURCE_AVAILABLE:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KiB, macOS bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+    except Exception:
+        return None
+
+
+def summarize(values):
+    """p50/p95/p99/mean of a list of milliseconds"""
+    if not values:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    return {
+        'count': int(values.size),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'p99': round(float(np.percentile(values, 99)), 3),
+        'mean': round(float(values.mean()), 3)
+    }
+
+
+def run_turn(bot, question, mode):
+    """One timed turn; returns the stage timings in milliseconds"""
+    start = time.perf_counter()
+    first_token = None
+
+    if mode == "stream":
+        for _ in bot.stream_chat(question):
+            if first_token is None:
+                first_token = time.perf_counter()
+    else:
+        bot.chat(question)
+    end = time.perf_counter()
+
+    timings = dict(bot.last_turn_timings)
+    timings['total_ms'] = (end - start) * 1000
+    if first_token is not None:
+        timings['ttft_ms'] = (first_token - start) * 1000
+
+    # LLM time = wall time not accounted for by the pipeline's own stages
+    pipeline = sum(timings.get(s, 0.0) for s in ('intent_ms', 'embed_ms', 'retrieval_ms',
+                                                  'prompt_build_ms', 'rlhf_ms'))
+    timings['llm_ms'] = max(0.0, timings['total_ms'] - pipeline)
+    return timings
+
+
+def run_level(make_bot, questions, sessions, turns_per_session, mode):
+    """
+    Run `sessions` concurrent conversations of `turns_per_session` turns each
+
+    Sessions start at evenly spread offsets in the question list, so they
+    are not lock-stepped on identical questions. Turns served from another
+    session's in-flight request (single-flight coalescing) are reported.
+    """
+    bots = [make_bot() for _ in range(sessions)]
+    stride = max(1, len(questions) // sessions)
+    single_flight = bots[0].single_flight
+    coalesced_before = single_flight.get_stats()['coalesced_requests'] if single_flight else 0
+    samples = []
+    errors = []
+    lock = threading.Lock()
+
+    def session(index):
+        bot = bots[index]
+        for turn in range(turns_per_session):
+            question = questions[(index * stride + turn) % len(questions)]
+            try:
+                timings = run_turn(bot, question, mode)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+                continue
+            with lock:
+                samples.append(timings)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(session, range(sessions)))
+    wall = time.perf_counter() - start
+
+    for bot in bots:
+        if bot.summarizer:
+            bot.summarizer.wait()
+
+    return {
+        'sessions': sessions,
+        'turns': len(samples),
+        'errors': len(errors),
+        'error_samples': errors[:5],
+        'wall_s': round(wall, 3),
+        'throughput_turns_per_s': round(len(samples) / wall, 3) if wall else 0.0,
+        'coalesced_turns': (single_flight.get_stats()['coalesced_requests'] - coalesced_before
+                            if single_flight else 0),
+        'stages': {
+            stage: summarize([t[stage] for t in samples if stage in t])
+            for stage in STAGES
+        }
+    }
+
+
+def run_coalescing_check(make_bot, question, sessions, mode, llm):
+    """
+    `sessions` fresh conversations ask the same opening question at once with
+    coalescing on; every turn should be served by a single upstream request
+    """
+    bots = [make_bot(coalesce=True) for _ in range(sessions)]
+    requests_before = llm.get_stats()['requests']
+    coalesced_before = bots[0].single_flight.get_stats()['coalesced_requests']
+    barrier = threading.Barrier(sessions)
+
+    def session(bot):
+        barrier.wait()
+        return run_turn(bot, question, mode)['total_ms']
+
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        totals = list(pool.map(session, bots))
+
+    return {
+        'sessions': sessions,
+        'upstream_requests': llm.get_stats()['requests'] - requests_before,
+        'coalesced_turns': bots[0].single_flight.get_stats()['coalesced_requests'] - coalesced_before,
+        'total_ms': summarize(totals)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end chat pipeline benchmark (stub LLM)")
+    parser.add_argument("--faq", default="./chatbot_dataset/frequently_asked_questions.md")
+    parser.add_argument("--persist-directory", default="./chroma_db")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16],
+                        help="Concurrency levels (concurrent chat sessions)")
+    parser.add_argument("--turns", type=int, default=10, help="Turns per session")
+    parser.add_argument("--mode", choices=["chat", "stream"], default="stream")
+    parser.add_argument("--backend", choices=["fake", "http"], default="fake",
+                        help="fake = in-process client, http = stub server through the Groq SDK")
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retrieval-mode", default="vector", choices=["vector", "hybrid", "numpy"])
+    parser.add_argument("--no-rlhf", action="store_true")
+    parser.add_argument("--rate-limit", action="store_true",
+                        help="Keep the Groq rate limiter on (off by default: it would dominate)")
+    parser.add_argument("--coalesce", action="store_true",
+                        help="Share identical concurrent requests (off by default: it hides LLM load)")
+    parser.add_argument("--coalesce-check", type=int, default=8, metavar="SESSIONS",
+                        help="Sessions asking one question at once with coalescing on (0 = skip)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("CHAT PIPELINE BENCHMARK")
+    print("="*80 + "\n")
+
+    questions = [q['question'] for q in extract_faq_questions(args.faq)]
+    print(f"✓ {len(questions)} FAQ questions from {args.faq}")
+
+    fake = FakeLLMClient(tokens_per_second=args.tokens_per_second, ttft_ms=args.ttft_ms,
+                         error_rate=args.error_rate)
+    server = None
+    if args.backend == "http":
+        server, base_url = start_server(fake)
+        print(f"✓ Stub LLM server on {base_url}")
+        backend = {'api_key': "stub", 'base_url': base_url}
+    else:
+        backend = {'api_key': None, 'llm_client': fake}
+
+    # RLHF writes its training data next to the app; keep benchmark samples out of it
+    scratch = tempfile.mkdtemp(prefix="flowbotics_bench_")
+
+    # One vector store shared by every session, as in the Streamlit app
+    shared = {}
+
+    def make_bot(coalesce=args.coalesce):
+        bot = FlowboticsChatbotOptimized(
+            persist_directory=args.persist_directory,
+            enable_rlhf=not args.no_rlhf,
+            retrieval_mode=args.retrieval_mode,
+            vectordb=shared.get('vectordb'),
+            rate_limit=args.rate_limit,
+            coalesce_requests=coalesce,
+            **backend
+        )
+        shared.setdefault('vectordb', bot.vectordb)
+        if bot.rlhf_system:
+            bot.rlhf_system.feedback_file = os.path.join(scratch, "rlhf_automated_data.json")
+            bot.rlhf_system.model_checkpoint = os.path.join(scratch, "rlhf_model_checkpoint.pt")
+        return bot
+
+    # Warm-up: load models and open the collection outside the measurements
+    run_turn(make_bot(), questions[0], args.mode)
+
+    levels = []
+    for sessions in args.sessions:
+        print(f"\n▶ {sessions} concurrent session(s) x {args.turns} turns ({args.mode})")
+        level = run_level(make_bot, questions, sessions, args.turns, args.mode)
+        levels.append(level)
+        print(f"  {level['throughput_turns_per_s']:.2f} turns/s, {level['errors']} errors"
+              + (f", {level['coalesced_turns']} coalesced" if args.coalesce else ""))
+        for stage, stats in level['stages'].items():
+            if stats:
+                print(f"  {stage:<16}p50 {stats['p50']:>9.2f}  p95 {stats['p95']:>9.2f}  "
+                      f"p99 {stats['p99']:>9.2f}")
+
+    coalescing = None
+    if args.coalesce_check > 1:
+        print(f"\n▶ Coalescing check: {args.coalesce_check} sessions, same opening question")
+        coalescing = run_coalescing_check(make_bot, questions[1], args.coalesce_check, args.mode, fake)
+        print(f"  {coalescing['upstream_requests']} upstream request(s) for {args.coalesce_check} turns, "
+              f"{coalescing['coalesced_turns']} coalesced")
+
+    results = {
+        'config': {k: v for k, v in vars(args).items() if k != 'output'},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count()
+        },
+        'questions': len(questions),
+        'levels': levels,
+        'coalescing': coalescing,
+        'llm': fake.get_stats(),
+        'peak_rss_mb': peak_rss_mb()
+    }
+    if results['peak_rss_mb'] is not None:
+        print(f"\n✓ Peak RSS: {results['peak_rss_mb']:.1f} MB")
+
+    if server:
+        server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,20 @@ chatbot_llm.py
 Groq API Chatbot with Safe Imports for Streamlit Deployment
 """
 
-from groq import Groq
 from datetime import datetime
+import hashlib
 import logging
 import os
+import time
 
 # Safe imports with fallbacks
+try:
+    from groq import Groq
+    GROQ_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Groq SDK not available: {e}")
+    GROQ_AVAILABLE = False
+    
 try:
     from Vector_dataset import VectorDBStore
     VECTORDB_AVAILABLE = True
@@ -16,6 +24,63 @@ except Exception as e:
     logging.warning(f"VectorDB not available: {e}")
     VECTORDB_AVAILABLE = False
     
+try:
+    from hybrid_retriever import HybridRetriever
+    HYBRID_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Hybrid retrieval not available: {e}")
+    HYBRID_AVAILABLE = False
+    
+try:
+    from numpy_retriever import NumpyRetriever
+    NUMPY_RETRIEVER_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"NumPy retriever not available: {e}")
+    NUMPY_RETRIEVER_AVAILABLE = False
+    
+try:
+    from quantized_storage import QuantizedRetriever
+    QUANTIZED_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Quantized storage not available: {e}")
+    QUANTIZED_AVAILABLE = False
+    
+try:
+    from query_router import KeywordRouter
+    ROUTER_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Query router not available: {e}")
+    ROUTER_AVAILABLE = False
+    
+try:
+    from reranker import CrossEncoderReranker
+    RERANKER_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Re-ranker not available: {e}")
+    RERANKER_AVAILABLE = False
+    
+try:
+    from kb_watcher import KnowledgeBaseWatcher
+    WATCHER_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Knowledge-base watcher not available: {e}")
+    WATCHER_AVAILABLE = False
+    
+try:
+    from intent_router import IntentRouter
+    INTENT_ROUTER_AVAILABLE = True
+except Exception as e:
+    logging.warning(f"Intent router not available: {e}")
+    INTENT_ROUTER_AVAILABLE = False
+    
+from prompt_builder import PromptBuilder
+from conversation_summarizer import ConversationSummarizer
+from request_coalescer import shared_single_flight
+from rate_limiter import limiter_for
+from model_cascade import ModelCascade, max_tokens_for
+import telemetry
+from profiler import profiled
+
 try:
     from RLFH_feedback import AutomatedRLHFSystem
     RLHF_AVAILABLE = True
@@ -26,6 +91,9 @@ except Exception as e:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Derived retriever files live here, never inside Chroma's persist directory
+RETRIEVER_CACHE_DIR = "./retriever_cache"
+
 
 class FlowboticsChatbotOptimized:
     """
@@ -33,7 +101,18 @@ class FlowboticsChatbotOptimized:
     """
     
     def __init__(self, api_key, model_name="llama-3.3-70b-versatile", 
-                 persist_directory: str = "./chroma_db", enable_rlhf=True):
+                 persist_directory: str = "./chroma_db", enable_rlhf=True,
+                 retrieval_mode: str = "vector", source_routing: bool = False,
+                 vectordb=None, storage_codec: str = None,
+                 enable_reranker: bool = False, rerank_candidates: int = 10,
+                 rerank_budget_ms: float = 150.0, watch_directory: str = None,
+                 enable_intent_router: bool = False, intent_threshold: float = 0.80,
+                 summarize_history: bool = False, history_token_budget: int = 1500,
+                 summary_model: str = "llama-3.1-8b-instant",
+                 coalesce_requests: bool = True, rate_limit: bool = True,
+                 base_url: str = None, enable_cascade: bool = False,
+                 cascade_model: str = "llama-3.1-8b-instant", llm_client=None,
+                 metrics_port: int = None, metrics_host: str = "127.0.0.1"):
         """
         Initialize optimized chatbot with Groq API
         
@@ -42,23 +121,59 @@ class FlowboticsChatbotOptimized:
             model_name: Groq model name
             persist_directory: ChromaDB storage path
             enable_rlhf: Enable automated RLHF training
+            retrieval_mode: "vector" (dense only), "hybrid" (BM25 + vector) or
+                            "numpy" (exact in-memory search, for small corpora)
+            source_routing: Route questions to matching document types before search
+            vectordb: Pre-built VectorDBStore to use (e.g. from TenantVectorStore.get)
+            storage_codec: With retrieval_mode="numpy", keep vectors compact
+                           ("float16", "int8", "pca128") and re-rank exactly
+            enable_reranker: Re-rank a wider candidate set with a cross-encoder
+            rerank_candidates: Candidates retrieved before re-ranking
+            rerank_budget_ms: Latency budget; re-ranking is skipped when exceeded
+            watch_directory: Dataset folder to watch for live knowledge-base updates
+            enable_intent_router: Answer greetings/canned intents locally from templates
+            intent_threshold: Minimum similarity for a template answer
+            summarize_history: Fold old turns into a running summary (in the background)
+            history_token_budget: Unsummarized history tokens before folding
+            summary_model: Groq model used for summarization
+            coalesce_requests: Share one Groq call between identical concurrent
+                               requests - same question, context and conversation
+                               so far (process-wide)
+            rate_limit: Queue requests through the process-wide Groq rate limiter
+                        (token buckets + header-driven retries)
+            base_url: Alternative API endpoint (e.g. a local stub server)
+            enable_cascade: Answer with cascade_model first and escalate to
+                            model_name only when a local check fails
+            cascade_model: Small, fast model tried first in cascade mode
+            llm_client: Chat-completions client to use instead of Groq (e.g.
+                        fake_llm.FakeLLMClient for offline load tests);
+                        no API key is needed then
+            metrics_port: Serve Prometheus metrics on this port (once per process)
+            metrics_host: Interface for the metrics endpoint ("0.0.0.0" = all)
         """
         
         # Validate API key
         self.api_key = api_key 
-        if not self.api_key:
+        if not self.api_key and llm_client is None:
             raise ValueError("Groq API key required!")
         
-        # Initialize Groq client
-        try:
-            self.client = Groq(api_key=self.api_key)
-            self.model_name = model_name
-        except Exception as e:
-            raise ValueError(f"Failed to initialize Groq client: {e}")
+        # Initialize Groq client (or use the injected backend)
+        self.model_name = model_name
+        if llm_client is not None:
+            self.client = llm_client
+        elif not GROQ_AVAILABLE:
+            raise ValueError("Groq SDK not installed (pass llm_client to use another backend)")
+        else:
+            try:
+                # The rate limiter owns retries, so the SDK's own retries are disabled
+                self.client = Groq(api_key=self.api_key, base_url=base_url,
+                                   max_retries=0 if rate_limit else 2)
+            except Exception as e:
+                raise ValueError(f"Failed to initialize Groq client: {e}")
         
         # Initialize VectorDB (optional)
-        self.vectordb = None
-        if VECTORDB_AVAILABLE:
+        self.vectordb = vectordb
+        if self.vectordb is None and VECTORDB_AVAILABLE:
             try:
                 self.vectordb = VectorDBStore(persist_directory=persist_directory)
                 logger.info(f"✓ VectorDB loaded: {self.vectordb.get_stats()} chunks")
@@ -66,6 +181,79 @@ class FlowboticsChatbotOptimized:
                 logger.warning(f"VectorDB initialization failed: {e}")
                 self.vectordb = None
         
+        # Retriever used for RAG (hybrid falls back to plain vector search)
+        self.retriever = self.vectordb
+        self.last_retrieval_timings = {}
+        self.last_turn_timings = {}
+        self.last_trace = None
+        self.last_query_embedding = None
+        self.last_context_ids = []
+        self.router = None
+        if self.vectordb and source_routing and ROUTER_AVAILABLE:
+            try:
+                # Indexes built before doc_type existed would return nothing for every
+                # routed query and always fall back to a second, unfiltered search
+                if self.vectordb.has_metadata_field('doc_type'):
+                    self.router = KeywordRouter()
+                else:
+                    logger.warning("Source routing disabled: collection has no doc_type metadata "
+                                   "(rebuild it with Vector_dataset.py)")
+            except Exception as e:
+                logger.warning(f"Source routing initialization failed: {e}")
+        
+        # Cross-encoder re-ranker (optional)
+        self.reranker = None
+        self.rerank_candidates = rerank_candidates
+        if self.retriever and enable_reranker and RERANKER_AVAILABLE:
+            try:
+                self.reranker = CrossEncoderReranker(latency_budget_ms=rerank_budget_ms)
+                logger.info("✓ Re-ranker enabled")
+            except Exception as e:
+                logger.warning(f"Re-ranker initialization failed: {e}")
+                self.reranker = None
+        if self.vectordb and retrieval_mode == "hybrid" and HYBRID_AVAILABLE:
+            try:
+                self.retriever = HybridRetriever(self.vectordb)
+                logger.info("✓ Hybrid retrieval enabled")
+            except Exception as e:
+                logger.warning(f"Hybrid retrieval initialization failed: {e}")
+                self.retriever = self.vectordb
+        elif self.vectordb and retrieval_mode == "numpy" and NUMPY_RETRIEVER_AVAILABLE:
+            try:
+                if storage_codec and QUANTIZED_AVAILABLE:
+                    # Full-precision rows for the exact re-rank stay on disk, not on the heap
+                    self.retriever = QuantizedRetriever.from_vectordb(
+                        self.vectordb, codec=storage_codec,
+                        mmap_path=self.retriever_cache_path(self.vectordb, storage_codec)
+                    )
+                else:
+                    self.retriever = NumpyRetriever.from_vectordb(self.vectordb)
+                logger.info("✓ NumPy brute-force retrieval enabled")
+            except Exception as e:
+                logger.warning(f"NumPy retriever initialization failed: {e}")
+                self.retriever = self.vectordb
+        
+        # Fast-path intent router (reuses the VectorDB embedding model)
+        self.intent_router = None
+        if self.vectordb and enable_intent_router and INTENT_ROUTER_AVAILABLE:
+            try:
+                self.intent_router = IntentRouter(self.vectordb.embed, threshold=intent_threshold)
+                logger.info("✓ Intent fast path enabled")
+            except Exception as e:
+                logger.warning(f"Intent router initialization failed: {e}")
+                self.intent_router = None
+        
+        # Live knowledge-base updates (optional)
+        self.kb_watcher = None
+        if self.vectordb and watch_directory and WATCHER_AVAILABLE:
+            if NUMPY_RETRIEVER_AVAILABLE and isinstance(self.retriever, NumpyRetriever):
+                logger.warning("Knowledge-base updates won't reach the in-memory NumPy retriever")
+            try:
+                self.kb_watcher = KnowledgeBaseWatcher(self.vectordb, watch_directory).start()
+            except Exception as e:
+                logger.warning(f"Knowledge-base watcher failed to start: {e}")
+                self.kb_watcher = None
+        
         # Initialize RLHF (optional)
         self.rlhf_system = None
         self.enable_rlhf = enable_rlhf and RLHF_AVAILABLE
@@ -137,21 +325,104 @@ Response Guidelines:
 - NEVER list all services/features unless specifically asked
 - Focus on relevance, not completeness"""
 
+        # Shared rate limiter for this model (None = call Groq directly)
+        self.rate_limit = rate_limit
+        self.rate_limiter = limiter_for(model_name) if rate_limit else None
+        
+        # Small model first, model_name on escalation (optional)
+        self.cascade = None
+        if enable_cascade:
+            self.cascade = ModelCascade(
+                small_model=cascade_model,
+                large_model=model_name,
+                reward_model=self.rlhf_system.reward_model if self.rlhf_system else None
+            )
+        
+        # Single-flight registry shared by all sessions in this process
+        self.single_flight = shared_single_flight if coalesce_requests else None
+        
+        # Rolling summary of old turns (optional)
+        self.summarizer = None
+        if summarize_history:
+            self.summarizer = ConversationSummarizer(
+                self.client, model_name=summary_model, token_budget=history_token_budget,
+                rate_limiter=limiter_for(summary_model) if rate_limit else None
+            )
+        
+        # Prompt builder keeps the request prefix stable for provider caching;
+        # with a summarizer the token budget bounds history, the cap is a safety net
+        self.prompt_builder = PromptBuilder(
+            self.system_prompt,
+            max_history_messages=30 if self.summarizer else 10
+        )
+        
+        # Metrics endpoint (optional) - a busy port must not stop the chatbot
+        if metrics_port:
+            try:
+                telemetry.serve_metrics(metrics_port, host=metrics_host)
+            except Exception as e:
+                logger.warning(f"Metrics endpoint not available on port {metrics_port}: {e}")
+        
         logger.info(f"✓ Chatbot initialized with Groq API")
         logger.info(f"✓ Model: {model_name}")
         logger.info(f"✓ VectorDB: {'Available' if self.vectordb else 'Disabled'}")
         logger.info(f"✓ RLHF: {'Enabled' if self.enable_rlhf else 'Disabled'}")
     
-    def get_relevant_context(self, question: str, n_results: int = 3) -> tuple:
-        """Retrieve relevant context from VectorDB (if available)"""
+    @staticmethod
+    def retriever_cache_path(vectordb, codec):
+        """Per-collection cache file for the full-precision re-rank matrix"""
+        store = hashlib.sha1(os.path.abspath(vectordb.persist_directory).encode('utf-8')).hexdigest()[:10]
+        return os.path.join(RETRIEVER_CACHE_DIR, f"{vectordb.collection_name}-{store}-{codec}.npy")
+    
+    def embed_query(self, question: str):
+        """Embed the user's question once per turn (None without VectorDB)"""
         if not self.vectordb:
+            return None
+        
+        try:
+            return self.vectordb.embed([question])[0]
+        except Exception as e:
+            logger.warning(f"Query embedding failed: {e}")
+            return None
+    
+    @profiled("get_relevant_context")
+    def get_relevant_context(self, question: str, n_results: int = 3,
+                             query_embedding=None) -> tuple:
+        """Retrieve relevant context from VectorDB (if available)"""
+        self.last_context_ids = []
+        if not self.retriever:
             return "", []
         
         try:
-            results = self.vectordb.query(question, n_results=n_results)
+            start = time.perf_counter()
+            
+            # Re-ranking needs a wider candidate set to choose from
+            fetch = max(self.rerank_candidates, n_results) if self.reranker else n_results
+            
+            # Narrow the search to routed document types, widen again if too few hits
+            where = self.router.route_filter(question) if self.router else None
+            with telemetry.span('vector_search'):
+                results = self.retriever.query(
+                    question, n_results=fetch, query_embedding=query_embedding, where=where
+                )
+                if where and len(results['documents'][0]) < n_results:
+                    results = self.retriever.query(
+                        question, n_results=fetch,
+                        query_embedding=results.get('query_embedding', query_embedding)
+                    )
             
+            if self.reranker:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                with telemetry.span('rerank'):
+                    results = self.reranker.rerank(
+                        question, results, top_k=n_results, elapsed_ms=elapsed_ms
+                    )
             if not results or not results['documents'][0]:
+                self.last_retrieval_timings = {}
                 return "", []
+            self.last_retrieval_timings = results.get('timings', {})
+            self.last_query_embedding = results.get('query_embedding', query_embedding)
+            self.last_context_ids = list(results['ids'][0])
             
             # Format context
             context_parts = []
@@ -167,165 +438,302 @@ Response Guidelines:
             logger.warning(f"Context retrieval failed: {e}")
             return "", []
     
-    def chat(self, user_message: str, use_rag: bool = True) -> str:
+    def route_intent(self, user_message: str) -> tuple:
         """
-        Generate response with optional RAG
-        
-        Args:
-            user_message: User's question
-            use_rag: Whether to use RAG (if available)
+        Try the local fast path
         
         Returns:
-            Assistant's response
+            (match, query_embedding) - match is (intent, score, response) or None;
+            the embedding is returned so the slow path doesn't recompute it
+        """
+        if not self.intent_router:
+            return None, None
+        
+        match = self.intent_router.match_exact(user_message)
+        if match:
+            return match, None
+        
+        query_embedding = self.embed_query(user_message)
+        if query_embedding is None:
+            return None, None
+        return self.intent_router.match(user_message, query_embedding=query_embedding), query_embedding
+    
+    def answer_from_intent(self, user_message: str, match: tuple) -> str:
+        """Record a template answer in the conversation and return it"""
+        intent, score, response = match
+        self.conversation_history.append({"role": "user", "content": user_message})
+        self.conversation_history.append({"role": "assistant", "content": response})
+        logger.info(f"Fast path: {intent} ({score:.2f})")
+        telemetry.finish_trace(self.last_trace, path="intent", intent=intent)
+        return response
+    
+    def prepare_turn(self, user_message: str, use_rag: bool = True) -> dict:
         """
+        Retrieve context and build the request messages for one turn
         
+        Returns:
+            Dict with 'messages', 'context', 'context_ids' and 'query_embedding'
+        """
         # Check for casual greeting
         greetings = ['hi', 'hey', 'hello', 'hola', 'yo', 'sup', 'wassup']
         is_greeting = user_message.lower().strip() in greetings
         
-        sources = []
+        # Spans for this turn ('<stage>_ms' timings are kept in last_turn_timings)
+        self.last_trace = telemetry.start_trace(model=self.model_name)
+        self.last_turn_timings = self.last_trace.timings
+        
+        # Canned intents are answered locally without an LLM call
+        with telemetry.span('intent'):
+            match, query_embedding = self.route_intent(user_message)
+        if match:
+            telemetry.metrics.inc('flowbotics_turns_total', path="intent")
+            return {'match': match}
+        
         context = ""
+        context_ids = []
         
-        # Build prompt with RAG (if available)
+        # Retrieve context with RAG (if available)
         if use_rag and not is_greeting and self.vectordb:
-            context, sources = self.get_relevant_context(user_message)
+            # One embedding per turn, shared by retrieval, RLHF and logging
+            with telemetry.span('embed'):
+                if query_embedding is None:
+                    query_embedding = self.embed_query(user_message)
+            self.last_query_embedding = query_embedding
             
-            if context:
-                prompt = f"""Use this information to answer:
-
-{context}
-
-Question: {user_message}
-
-Answer naturally without mentioning the context."""
-            else:
-                prompt = user_message
-        else:
-            prompt = user_message
+            with telemetry.span('retrieval'):
+                context, sources = self.get_relevant_context(
+                    user_message, query_embedding=query_embedding
+                )
+            context_ids = list(self.last_context_ids)
+        
+        first_turn = not self.conversation_history
         
-        # Add to conversation history
+        # Stable prefix + summary + canonical history, volatile context last
+        with telemetry.span('prompt_build'):
+            summary, history = "", self.conversation_history
+            if self.summarizer:
+                summary, history = self.summarizer.recent(self.conversation_history)
+            messages = self.prompt_builder.build(history, user_message, context, summary=summary)
+        
+        # Requests are interchangeable when everything sent besides the question's
+        # spelling matches: same question, context, summary and history window
+        coalesce_key = None
+        if self.single_flight:
+            coalesce_key = self.single_flight.make_key(
+                self.model_name, " ".join(user_message.lower().split()), context, summary,
+                self.system_prompt, self.prompt_builder.history_window(history)
+            )
+        
+        # History keeps the raw question so earlier turns never change
         self.conversation_history.append({
             "role": "user",
-            "content": prompt
+            "content": user_message
         })
         
-        # Prepare messages
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            *self.conversation_history[-10:]  # Keep last 10 exchanges
-        ]
-        
-        # Get response from Groq
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2048,
-                top_p=0.9
-            )
-            assistant_message = response.choices[0].message.content
-        except Exception as e:
-            logger.error(f"Groq API error: {e}")
-            assistant_message = "I apologize, but I encountered an error. Please try again."
+        return {
+            'match': None,
+            'first_turn': first_turn,
+            'coalesce_key': coalesce_key,
+            'messages': messages,
+            'trace': self.last_trace,
+            'context': context,
+            'context_ids': context_ids,
+            'query_embedding': query_embedding
+        }
+    
+    def finish_turn(self, user_message: str, assistant_message: str, turn: dict):
+        """Record the answer and hand the interaction to RLHF"""
         
-        # Add to history
+        # Add to history (never a None reply - it would break the next prompt build)
         self.conversation_history.append({
             "role": "assistant",
-            "content": assistant_message
+            "content": assistant_message or ""
         })
         
+        # Fold old turns into the summary in the background
+        if self.summarizer:
+            self.summarizer.maybe_schedule(self.conversation_history)
+        
         # Process with RLHF (if available)
         if self.enable_rlhf and self.rlhf_system:
-            try:
-                self.rlhf_system.process_interaction(
-                    question=user_message,
-                    response=assistant_message,
-                    context=context,
-                    auto_train=True
-                )
-            except Exception as e:
-                logger.warning(f"RLHF processing failed: {e}")
+            with telemetry.span('rlhf'):
+                try:
+                    self.rlhf_system.process_interaction(
+                        question=user_message,
+                        response=assistant_message,
+                        context=turn['context'],
+                        auto_train=True,
+                        query_embedding=turn['query_embedding'],
+                        context_ids=turn['context_ids']
+                    )
+                except Exception as e:
+                    logger.warning(f"RLHF processing failed: {e}")
         
-        return assistant_message
+        telemetry.finish_trace(turn['trace'], path="llm")
     
-    def stream_chat(self, user_message: str, use_rag: bool = True):
-        """Stream response with optional RAG"""
+    def create_completion(self, **kwargs):
+        """chat.completions.create, through the model's rate limiter when enabled (metered)"""
+        model = kwargs['model']
+        trace = telemetry.current_trace()
+        telemetry.metrics.inc('flowbotics_llm_requests_total', model=model)
+        try:
+            if self.rate_limit:
+                response = limiter_for(model).create(self.client, **kwargs)
+            else:
+                response = self.client.chat.completions.create(**kwargs)
+        except Exception:
+            telemetry.metrics.inc('flowbotics_llm_errors_total', model=model)
+            raise
         
-        greetings = ['hi', 'hey', 'hello', 'hola', 'yo', 'sup', 'wassup']
-        is_greeting = user_message.lower().strip() in greetings
+        if kwargs.get('stream'):
+            return self.metered_stream(response, model, kwargs['messages'], trace)
         
-        sources = []
-        context = ""
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            telemetry.record_tokens(model, usage.prompt_tokens, usage.completion_tokens, trace)
+        return response
+    
+    def metered_stream(self, stream, model, messages, trace=None):
+        """Pass stream chunks through and record token usage when it ends"""
+        usage = None
+        chunks = 0
+        for chunk in stream:
+            # Groq reports usage on the final chunk (x_groq.usage)
+            usage = getattr(getattr(chunk, 'x_groq', None), 'usage', None) or usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                chunks += 1
+            yield chunk
         
-        # Build prompt with RAG (if available)
-        if use_rag and not is_greeting and self.vectordb:
-            context, sources = self.get_relevant_context(user_message)
-            
-            if context:
-                prompt = f"""Use this information to answer:
-
-{context}
-
-Question: {user_message}
-
-Answer naturally without mentioning the context."""
-            else:
-                prompt = user_message
+        if usage is not None:
+            telemetry.record_tokens(model, usage.prompt_tokens, usage.completion_tokens, trace)
         else:
-            prompt = user_message
+            # ~1 token per streamed chunk, ~4 characters per prompt token
+            prompt_tokens = sum(len(m['content']) for m in messages) // 4
+            telemetry.record_tokens(model, prompt_tokens, chunks, trace)
+    
+    def complete(self, messages: list, max_tokens: int = 2048) -> str:
+        """Single Groq completion"""
+        response = self.create_completion(
+            model=self.model_name,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            top_p=0.9
+        )
+        return response.choices[0].message.content
+    
+    def stream_tokens(self, messages: list, max_tokens: int = 2048):
+        """Stream Groq completion tokens"""
+        stream = self.create_completion(
+            model=self.model_name,
+            messages=messages,
+            temperature=0.7,
+            max_tokens=max_tokens,
+            top_p=0.9,
+            stream=True
+        )
         
-        self.conversation_history.append({
-            "role": "user",
-            "content": prompt
-        })
+        for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    
+    def generate(self, user_message: str, turn: dict) -> str:
+        """Answer text for a prepared turn (through the cascade when enabled)"""
+        if self.cascade:
+            return self.cascade.answer(
+                self.create_completion, turn['messages'], user_message, turn['context'],
+                temperature=0.7, top_p=0.9
+            )
+        # Same budget the cascade gives the large model
+        return self.complete(turn['messages'], max_tokens=max_tokens_for(user_message, large=True))
+    
+    def generate_stream(self, user_message: str, turn: dict):
+        """Answer tokens for a prepared turn (through the cascade when enabled)"""
+        if self.cascade:
+            return self.cascade.stream(
+                self.create_completion, turn['messages'], user_message, turn['context'],
+                temperature=0.7, top_p=0.9
+            )
+        return self.stream_tokens(turn['messages'], max_tokens=max_tokens_for(user_message, large=True))
+    
+    @profiled("chat")
+    def chat(self, user_message: str, use_rag: bool = True) -> str:
+        """
+        Generate response with optional RAG
+        
+        Args:
+            user_message: User's question
+            use_rag: Whether to use RAG (if available)
+        
+        Returns:
+            Assistant's response
+        """
+        turn = self.prepare_turn(user_message, use_rag)
+        if turn['match']:
+            return self.answer_from_intent(user_message, turn['match'])
+        
+        # Get response from Groq (shared with identical concurrent requests)
+        try:
+            with telemetry.span('llm_total'):
+                if turn['coalesce_key']:
+                    assistant_message = self.single_flight.call(
+                        turn['coalesce_key'], lambda: self.generate(user_message, turn)
+                    )
+                else:
+                    assistant_message = self.generate(user_message, turn)
+            if assistant_message is None:
+                raise ValueError("LLM returned no content")
+            telemetry.metrics.inc('flowbotics_turns_total', path="llm")
+        except Exception as e:
+            logger.error(f"Groq API error: {e}")
+            telemetry.metrics.inc('flowbotics_turns_total', path="error")
+            assistant_message = "I apologize, but I encountered an error. Please try again."
+        
+        self.finish_turn(user_message, assistant_message, turn)
+        return assistant_message
+    
+    @profiled("stream_chat")
+    def stream_chat(self, user_message: str, use_rag: bool = True):
+        """Stream response with optional RAG"""
         
-        messages = [
-            {"role": "system", "content": self.system_prompt},
-            *self.conversation_history[-10:]
-        ]
+        turn = self.prepare_turn(user_message, use_rag)
+        if turn['match']:
+            yield self.answer_from_intent(user_message, turn['match'])
+            return
         
-        # Stream response from Groq
+        # Stream response from Groq (fanned out to identical concurrent requests)
         full_response = ""
+        trace = turn['trace']
+        start = time.perf_counter()
         try:
-            stream = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=2048,
-                top_p=0.9,
-                stream=True
-            )
+            if turn['coalesce_key']:
+                # The leader's stream is drained on a worker thread; keep its
+                # LLM requests and tokens on this turn's trace
+                def leader_stream():
+                    with telemetry.use_trace(trace):
+                        yield from self.generate_stream(user_message, turn)
+                
+                tokens = self.single_flight.stream(turn['coalesce_key'], leader_stream)
+            else:
+                tokens = self.generate_stream(user_message, turn)
             
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    token = chunk.choices[0].delta.content
-                    full_response += token
-                    yield token
+            for token in tokens:
+                if not full_response:
+                    telemetry.record_span('llm_ttft', start, time.perf_counter() - start, trace)
+                full_response += token
+                yield token
+            
+            telemetry.record_span('llm_total', start, time.perf_counter() - start, trace)
+            telemetry.metrics.inc('flowbotics_turns_total', path="llm")
         
         except Exception as e:
             logger.error(f"Groq stream error: {e}")
+            telemetry.metrics.inc('flowbotics_turns_total', path="error")
             error_msg = "I apologize, but I encountered an error."
             full_response = error_msg
             yield error_msg
         
-        # Add to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": full_response
-        })
-        
-        # Process with RLHF (if available)
-        if self.enable_rlhf and self.rlhf_system:
-            try:
-                self.rlhf_system.process_interaction(
-                    question=user_message,
-                    response=full_response,
-                    context=context,
-                    auto_train=True
-                )
-            except Exception as e:
-                logger.warning(f"RLHF processing failed: {e}")
+        self.finish_turn(user_message, full_response, turn)
     
     def show_rlhf_stats(self):
         """Display RLHF statistics"""
@@ -344,6 +752,8 @@ Answer naturally without mentioning the context."""
     def clear_history(self):
         """Clear conversation history"""
         self.conversation_history = []
+        if self.summarizer:
+            self.summarizer.reset()
         logger.info("✓ Conversation history cleared")
     
     def save_conversation(self, filename: str = None):
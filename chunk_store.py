@@ -0,0 +1,136 @@
+"""
+chunk_store.py
+Binary Chunk Store - Length-prefixed records with an offset index, keyed by stable chunk id
+
+File layout:
+    b"FBCS" + version byte
+    records: [uint32 length][UTF-8 JSON chunk] ...
+    index:   UTF-8 JSON {chunk_id: [offset, length], ...}
+    footer:  [uint64 index offset][uint32 index length] + b"FBCS"
+"""
+
+import json
+import os
+import struct
+import threading
+
+MAGIC = b"FBCS"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+RECORD_LEN = struct.Struct("<I")
+FOOTER = struct.Struct("<QI4s")
+
+
+def make_chunk_id(chunk):
+    """Stable chunk id - same '<source>_<index>' id used in the vector store"""
+    return f"{chunk.get('source', 'unknown')}_{chunk.get('chunk_id', 0)}"
+
+
+class ChunkStore:
+    """Random access by chunk id and streaming iteration over a chunk file"""
+
+    def __init__(self, path="chunks.fbcs"):
+        """Open an existing store for reading"""
+        self.path = path
+        self.file = open(path, 'rb')
+        self.lock = threading.Lock()
+
+        if self.file.read(len(HEADER)) != HEADER:
+            raise ValueError(f"{path} is not a chunk store (or has an unsupported version)")
+
+        # Footer points at the JSON index
+        self.file.seek(-FOOTER.size, os.SEEK_END)
+        index_offset, index_length, magic = FOOTER.unpack(self.file.read(FOOTER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is truncated (missing footer)")
+        self.records_end = index_offset
+
+        self.file.seek(index_offset)
+        self.index = json.loads(self.file.read(index_length).decode('utf-8'))
+
+    @staticmethod
+    def write(path, chunks):
+        """
+        Write chunks to a new store (atomically replaces `path`)
+
+        Returns:
+            Number of chunks written
+        """
+        index = {}
+        tmp_path = f"{path}.tmp"
+
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER)
+            for chunk in chunks:
+                chunk_id = make_chunk_id(chunk)
+                payload = json.dumps(chunk, ensure_ascii=False).encode('utf-8')
+                index[chunk_id] = [f.tell() + RECORD_LEN.size, len(payload)]
+                f.write(RECORD_LEN.pack(len(payload)))
+                f.write(payload)
+
+            index_offset = f.tell()
+            index_bytes = json.dumps(index, ensure_ascii=False).encode('utf-8')
+            f.write(index_bytes)
+            f.write(FOOTER.pack(index_offset, len(index_bytes), MAGIC))
+
+        os.replace(tmp_path, path)
+        print(f"✓ {len(index)} chunks saved to {path}")
+        return len(index)
+
+    def get(self, chunk_id, default=None):
+        """Read one chunk by id (a single seek + read)"""
+        entry = self.index.get(chunk_id)
+        if entry is None:
+            return default
+        offset, length = entry
+        with self.lock:
+            self.file.seek(offset)
+            data = self.file.read(length)
+        return json.loads(data.decode('utf-8'))
+
+    def get_many(self, chunk_ids):
+        """Read several chunks by id, in the given order (missing ids are skipped)"""
+        # Read in file order to keep the access pattern sequential
+        wanted = sorted((self.index[c][0], c) for c in chunk_ids if c in self.index)
+        found = {chunk_id: self.get(chunk_id) for _, chunk_id in wanted}
+        return [found[c] for c in chunk_ids if c in found]
+
+    def ids(self):
+        """All chunk ids in storage order"""
+        return sorted(self.index, key=lambda c: self.index[c][0])
+
+    def __iter__(self):
+        """Stream chunks in storage order without loading the whole file"""
+        with open(self.path, 'rb') as f:
+            f.seek(len(HEADER))
+            while f.tell() < self.records_end:
+                (length,) = RECORD_LEN.unpack(f.read(RECORD_LEN.size))
+                yield json.loads(f.read(length).decode('utf-8'))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, chunk_id):
+        return chunk_id in self.index
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+
+    import sys
+
+    path = sys.argv[1] if len(sys.argv) > 1 else "chunks.fbcs"
+
+    with ChunkStore(path) as store:
+        print(f"📊 {len(store)} chunks in {path}")
+        for chunk_id in store.ids()[:5]:
+            chunk = store.get(chunk_id)
+            print(f"  {chunk_id}: {chunk['content'][:80]!r}")
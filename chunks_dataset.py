@@ -4,72 +4,541 @@ Uses LangChain (free, open-source) for intelligent text splitting
 """
 
 from langchain_text_splitters  import RecursiveCharacterTextSplitter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 import os
+import re
+import time
 
-def chunk_markdown_files(directory_path, chunk_size=1000, chunk_overlap=200):
+
+# Document type per knowledge-base file (used for retrieval routing)
+DOC_TYPES = {
+    "customer_success_stories.md": "case_study",
+    "flowbotics_services.md": "services",
+    "frequently_asked_questions.md": "faq",
+    "integration_guides.md": "integration",
+    "pricing_packages.md": "pricing",
+    "technical_specifications.md": "technical"
+}
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*$", re.MULTILINE)
+
+
+def get_doc_type(filename):
+    """Document type for a file, guessed from its name if not registered"""
+    if filename in DOC_TYPES:
+        return DOC_TYPES[filename]
+    name = filename.lower()
+    for keyword, doc_type in [("pric", "pricing"), ("faq", "faq"), ("question", "faq"),
+                              ("integrat", "integration"), ("spec", "technical"),
+                              ("case", "case_study"), ("stor", "case_study"),
+                              ("service", "services")]:
+        if keyword in name:
+            return doc_type
+    return "general"
+
+
+def heading_path_at(headings, offset):
+    """Markdown heading path (e.g. 'Pricing > Starter') in effect at offset"""
+    stack = []
+    for heading_offset, level, title in headings:
+        if heading_offset > offset:
+            break
+        stack = [h for h in stack if h[0] < level] + [(level, title)]
+    return " > ".join(title for _, title in stack)
+
+
+def locate_heading_paths(content, chunks):
+    """Pair plain-text chunks with the heading path where each one starts"""
+    headings = [
+        (m.start(), len(m.group(1)), m.group(2))
+        for m in HEADING_PATTERN.finditer(content)
+    ]
+    
+    located = []
+    search_from = 0
+    for chunk in chunks:
+        offset = content.find(chunk, search_from)
+        if offset == -1:
+            offset = search_from
+        else:
+            search_from = offset + 1
+        located.append((chunk, heading_path_at(headings, offset)))
+    return located
+
+def load_token_counter(model_name="sentence-transformers/all-MiniLM-L6-v2"):
     """
-    Chunk all markdown files in the dataset directory
+    Token counter matching the embedding model's tokenizer
     
-    Args:
-        directory_path: Path to your chatbot_dataset folder
-        chunk_size: Maximum size of each chunk (in characters)
-        chunk_overlap: Overlap between chunks to maintain context
+    Falls back to a words * 1.3 estimate when transformers isn't installed.
+    """
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+    except Exception as e:
+        print(f"✗ Tokenizer unavailable ({e}), estimating tokens from words")
+        return lambda text: int(len(text.split()) * 1.3) + 1
+
+
+class MarkdownTokenSplitter:
+    """
+    Markdown-aware splitter sized in embedding-model tokens
     
-    Returns:
-        List of document chunks with metadata
+    - Chunks never start mid-section when a whole section fits
+    - Small sections are packed together, but never across a heading of
+      level <= flush_level (so a chunk stays within one ## topic)
+    - Tables and code blocks stay intact (oversized tables are split by
+      rows, repeating the header row)
+    - Each chunk carries the heading path of the section it starts in
     """
     
-    # Initialize the text splitter
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        length_function=len,
-        separators=["\n\n", "\n", ". ", " ", ""]  # Split by paragraphs, then sentences
-    )
+    def __init__(self, max_tokens=256, token_counter=None, flush_level=2):
+        """
+        Args:
+            max_tokens: Model input limit (all-MiniLM-L6-v2 truncates after 256)
+            token_counter: Callable text -> token count (defaults to the MiniLM tokenizer)
+            flush_level: Headings at this level or above (# .. ##) always start a new chunk
+        """
+        # Leave room for the [CLS] and [SEP] tokens added at embedding time
+        self.max_tokens = max_tokens - 2
+        self.flush_level = flush_level
+        self.count_tokens = token_counter or load_token_counter()
     
-    all_chunks = []
+    def parse_sections(self, content):
+        """Split a document into (heading_path, heading_line, body) sections"""
+        sections = []
+        stack = []
+        heading_line = ""
+        body = []
+        
+        def flush():
+            if heading_line or "".join(body).strip():
+                path = " > ".join(title for _, title in stack)
+                sections.append((path, heading_line, "\n".join(body).strip("\n")))
+        
+        in_code = False
+        for line in content.split("\n"):
+            if line.strip().startswith("```"):
+                in_code = not in_code
+            match = None if in_code else HEADING_PATTERN.match(line)
+            if match:
+                flush()
+                level, title = len(match.group(1)), match.group(2)
+                stack = [h for h in stack if h[0] < level] + [(level, title)]
+                heading_line = line.strip()
+                body = []
+            else:
+                body.append(line)
+        flush()
+        return sections
     
-    # List of your markdown files
-    files = [
-        "customer_success_stories.md",
-        "flowbotics_services.md",
-        "frequently_asked_questions.md",
-        "integration_guides.md",
-        "pricing_packages.md",
-        "technical_specifications.md"
-    ]
+    @staticmethod
+    def parse_blocks(body):
+        """Split a section body into paragraphs, list runs, tables and code blocks"""
+        blocks = []
+        current = []
+        kind = None
+        
+        def flush():
+            if current and "".join(current).strip():
+                blocks.append((kind or "text", "\n".join(current)))
+        
+        for line in body.split("\n"):
+            stripped = line.strip()
+            if kind == "code":
+                current.append(line)
+                if stripped.startswith("```"):
+                    flush()
+                    current, kind = [], None
+                continue
+            
+            if stripped.startswith("```"):
+                flush()
+                current, kind = [line], "code"
+            elif stripped.startswith("|"):
+                if kind != "table":
+                    flush()
+                    current, kind = [], "table"
+                current.append(line)
+            elif not stripped:
+                flush()
+                current, kind = [], None
+            else:
+                if kind == "table":
+                    flush()
+                    current, kind = [], None
+                current.append(line)
+                kind = kind or "text"
+        flush()
+        return blocks
     
-    # Process each file
-    for filename in files:
-        file_path = os.path.join(directory_path, filename)
+    def split_block(self, kind, text):
+        """Break a single block that is larger than max_tokens"""
+        if kind == "table":
+            rows = text.split("\n")
+            header = rows[:2] if len(rows) > 1 and set(rows[1].strip()) <= set("|-: ") else rows[:1]
+            pieces, current = [], list(header)
+            for row in rows[len(header):]:
+                candidate = "\n".join(current + [row])
+                if len(current) > len(header) and self.count_tokens(candidate) > self.max_tokens:
+                    pieces.append("\n".join(current))
+                    current = list(header)
+                current.append(row)
+            pieces.append("\n".join(current))
+            return pieces
         
-        try:
-            # Read the file
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
+        # Paragraphs / lists / code: lines first, then sentences, then words
+        units = text.split("\n") if "\n" in text else re.split(r"(?<=[.!?])\s+", text)
+        if len(units) == 1:
+            units = text.split(" ")
+            joiner = " "
+        else:
+            joiner = "\n" if "\n" in text else " "
+        
+        pieces, current = [], []
+        for unit in units:
+            candidate = joiner.join(current + [unit])
+            if current and self.count_tokens(candidate) > self.max_tokens:
+                pieces.append(joiner.join(current))
+                current = []
+            current.append(unit)
+        if current:
+            pieces.append(joiner.join(current))
+        
+        # Units that are still too long get split again at a finer level
+        result = []
+        for piece in pieces:
+            if self.count_tokens(piece) > self.max_tokens and piece != text:
+                result.extend(self.split_block("text", piece))
+            else:
+                result.append(piece)
+        return result
+    
+    def split_text(self, content):
+        """
+        Split a markdown document
+        
+        Returns:
+            List of (chunk_text, heading_path) tuples
+        """
+        chunks = []
+        current, current_tokens, current_path = [], 0, None
+        
+        def emit():
+            nonlocal current, current_tokens, current_path
+            if current:
+                chunks.append(("\n\n".join(current), current_path or ""))
+            current, current_tokens, current_path = [], 0, None
+        
+        for path, heading_line, body in self.parse_sections(content):
+            section_text = "\n\n".join(p for p in (heading_line, body) if p)
+            section_tokens = self.count_tokens(section_text)
+            heading = HEADING_PATTERN.match(heading_line) if heading_line else None
+            starts_topic = heading is not None and len(heading.group(1)) <= self.flush_level
             
-            # Split into chunks
-            chunks = text_splitter.split_text(content)
+            # Whole section fits: pack it with its neighbours under the same topic
+            if section_tokens <= self.max_tokens:
+                if starts_topic or current_tokens + section_tokens > self.max_tokens:
+                    emit()
+                if current_path is None:
+                    current_path = path
+                current.append(section_text)
+                current_tokens += section_tokens
+                continue
+            
+            # Oversized section: start fresh and fill by blocks
+            emit()
+            heading_tokens = self.count_tokens(heading_line) if heading_line else 0
+            current_path = path
+            if heading_line:
+                current, current_tokens = [heading_line], heading_tokens
+            
+            for kind, block in self.parse_blocks(body):
+                block_tokens = self.count_tokens(block)
+                pieces = [block] if block_tokens <= self.max_tokens - heading_tokens else \
+                    self.split_block(kind, block)
+                for piece in pieces:
+                    piece_tokens = self.count_tokens(piece)
+                    if current_tokens + piece_tokens > self.max_tokens and current_tokens > heading_tokens:
+                        emit()
+                        # Continuation chunks repeat the heading for context
+                        current_path = path
+                        if heading_line:
+                            current, current_tokens = [heading_line], heading_tokens
+                    current.append(piece)
+                    current_tokens += piece_tokens
+            emit()
+        
+        emit()
+        return chunks
+
+
+# Knowledge-base files chunked by default
+DEFAULT_FILES = [
+    "customer_success_stories.md",
+    "flowbotics_services.md",
+    "frequently_asked_questions.md",
+    "integration_guides.md",
+    "pricing_packages.md",
+    "technical_specifications.md"
+]
+
+SUPPORTED_EXTENSIONS = (".md", ".markdown", ".txt", ".html", ".htm")
+
+# Splitters are reused per process (the tokenizer is expensive to load)
+_SPLITTER_CACHE = {}
+
+
+def discover_files(directory_path, extensions=SUPPORTED_EXTENSIONS):
+    """All supported files under a directory, as sorted relative paths"""
+    found = []
+    for root, _, filenames in os.walk(directory_path):
+        for name in filenames:
+            if name.lower().endswith(extensions):
+                found.append(os.path.relpath(os.path.join(root, name), directory_path))
+    return sorted(found)
+
+
+def read_document(file_path):
+    """Read a file as text (HTML is reduced to its visible text)"""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        content = file.read()
+    
+    if file_path.lower().endswith((".html", ".htm")):
+        from html.parser import HTMLParser
+        
+        class _TextExtractor(HTMLParser):
+            def __init__(self):
+                super().__init__()
+                self.parts = []
+                self.skip = 0
             
-            # Add metadata to each chunk
-            for i, chunk in enumerate(chunks):
-                all_chunks.append({
-                    'content': chunk,
-                    'source': filename,
-                    'chunk_id': i,
-                    'total_chunks': len(chunks)
-                })
+            def handle_starttag(self, tag, attrs):
+                if tag in ("script", "style"):
+                    self.skip += 1
+                elif tag in ("p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"):
+                    self.parts.append("\n")
             
-            print(f"✓ {filename}: {len(chunks)} chunks created")
+            def handle_endtag(self, tag):
+                if tag in ("script", "style"):
+                    self.skip = max(self.skip - 1, 0)
             
-        except FileNotFoundError:
-            print(f"✗ {filename}: File not found")
+            def handle_data(self, data):
+                if not self.skip:
+                    self.parts.append(data)
+        
+        parser = _TextExtractor()
+        parser.feed(content)
+        content = re.sub(r"\n\s*\n+", "\n\n", "".join(parser.parts)).strip()
+    
+    return content
+
+
+def get_splitter(splitter="recursive", chunk_size=1000, chunk_overlap=200, max_tokens=256):
+    """Build (or reuse) the text splitter for a configuration"""
+    key = (splitter, chunk_size, chunk_overlap, max_tokens)
+    if key not in _SPLITTER_CACHE:
+        if splitter == "markdown":
+            _SPLITTER_CACHE[key] = MarkdownTokenSplitter(max_tokens=max_tokens)
+        else:
+            _SPLITTER_CACHE[key] = RecursiveCharacterTextSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap,
+                length_function=len,
+                separators=["\n\n", "\n", ". ", " ", ""]  # Split by paragraphs, then sentences
+            )
+    return _SPLITTER_CACHE[key]
+
+
+def chunk_file(directory_path, filename, splitter="recursive", chunk_size=1000,
+               chunk_overlap=200, max_tokens=256):
+    """
+    Chunk a single file (runs in worker processes, so it never raises)
+    
+    Returns:
+        Dict with 'filename', 'chunks', 'seconds' and 'error' (None on success)
+    """
+    start = time.perf_counter()
+    file_path = os.path.join(directory_path, filename)
+    
+    try:
+        text_splitter = get_splitter(splitter, chunk_size, chunk_overlap, max_tokens)
+        content = read_document(file_path)
+        
+        # Split into (chunk, heading path) pairs
+        if splitter == "markdown":
+            chunks = text_splitter.split_text(content)
+        else:
+            chunks = locate_heading_paths(content, text_splitter.split_text(content))
+        doc_type = get_doc_type(os.path.basename(filename))
+        
+        # Add metadata to each chunk
+        file_chunks = [{
+            'content': chunk,
+            'source': filename,
+            'chunk_id': i,
+            'total_chunks': len(chunks),
+            'doc_type': doc_type,
+            'heading_path': heading_path
+        } for i, (chunk, heading_path) in enumerate(chunks)]
+        error = None
+    except FileNotFoundError:
+        file_chunks, error = [], "File not found"
+    except Exception as e:
+        file_chunks, error = [], str(e)
+    
+    return {
+        'filename': filename,
+        'chunks': file_chunks,
+        'seconds': time.perf_counter() - start,
+        'error': error
+    }
+
+
+def _chunk_file_isolated(directory_path, filename, options):
+    """chunk_file in its own worker process, so a crash never reaches the caller"""
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        try:
+            return executor.submit(chunk_file, directory_path, filename, **options).result()
+        except BrokenProcessPool:
+            error = "worker crashed"
         except Exception as e:
-            print(f"✗ {filename}: Error - {str(e)}")
+            error = str(e)
+    return {'filename': filename, 'chunks': [], 'seconds': 0.0, 'error': error}
+
+
+def chunk_files_parallel(directory_path, files=None, max_workers=None, **options):
+    """
+    Chunk many files with a process pool
+    
+    Chunk order and ids are the same as a serial run: files are merged in
+    input order and ids are per file (source + chunk index). If a worker
+    dies, the pool is broken and every unfinished file fails with it; those
+    files are retried one per fresh single-worker pool, and a file that
+    crashes its worker again is reported as 'worker crashed'.
+    
+    Args:
+        directory_path: Folder holding the files
+        files: Relative file names (defaults to every supported file found)
+        max_workers: Pool size (defaults to the CPU count)
+        **options: splitter, chunk_size, chunk_overlap, max_tokens
+    
+    Returns:
+        (all_chunks, report) - report has one entry per file with
+        'filename', 'num_chunks', 'seconds' and 'error'
+    """
+    files = list(files) if files is not None else discover_files(directory_path)
+    results = [None] * len(files)
+    
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(chunk_file, directory_path, filename, **options): i
+            for i, filename in enumerate(files)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                results[i] = future.result()
+            except BrokenProcessPool:
+                pass    # retried serially below
+            except Exception as e:
+                results[i] = {'filename': files[i], 'chunks': [], 'seconds': 0.0, 'error': str(e)}
+    
+    unfinished = [i for i, result in enumerate(results) if result is None]
+    if unfinished:
+        print(f"⚠️  Worker pool crashed; retrying {len(unfinished)} file(s) one at a time")
+        for i in unfinished:
+            results[i] = _chunk_file_isolated(directory_path, files[i], options)
+    
+    all_chunks = []
+    report = []
+    for result in results:
+        all_chunks.extend(result['chunks'])
+        report.append({
+            'filename': result['filename'],
+            'num_chunks': len(result['chunks']),
+            'seconds': result['seconds'],
+            'error': result['error']
+        })
+    return all_chunks, report
+
+
+def chunk_markdown_files(directory_path, chunk_size=1000, chunk_overlap=200,
+                         splitter="recursive", max_tokens=256, files=None, workers=1):
+    """
+    Chunk all markdown files in the dataset directory
+    
+    Args:
+        directory_path: Path to your chatbot_dataset folder
+        chunk_size: Maximum size of each chunk (in characters)
+        chunk_overlap: Overlap between chunks to maintain context
+        splitter: "recursive" (character-sized) or "markdown" (heading/table
+                  aware, sized in embedding-model tokens)
+        max_tokens: Token limit per chunk for the markdown splitter
+        files: File names to chunk (defaults to DEFAULT_FILES)
+        workers: Number of worker processes (1 = serial)
+    
+    Returns:
+        List of document chunks with metadata
+    """
+    options = {
+        'splitter': splitter,
+        'chunk_size': chunk_size,
+        'chunk_overlap': chunk_overlap,
+        'max_tokens': max_tokens
+    }
+    files = list(files) if files is not None else DEFAULT_FILES
+    
+    if workers > 1:
+        all_chunks, report = chunk_files_parallel(
+            directory_path, files=files, max_workers=workers, **options
+        )
+    else:
+        all_chunks, report = [], []
+        for filename in files:
+            result = chunk_file(directory_path, filename, **options)
+            all_chunks.extend(result['chunks'])
+            report.append({
+                'filename': filename,
+                'num_chunks': len(result['chunks']),
+                'seconds': result['seconds'],
+                'error': result['error']
+            })
+    
+    for entry in report:
+        if entry['error']:
+            print(f"✗ {entry['filename']}: {entry['error']}")
+        else:
+            print(f"✓ {entry['filename']}: {entry['num_chunks']} chunks created "
+                  f"({entry['seconds'] * 1000:.0f} ms)")
     
     return all_chunks
 
 
+def extract_faq_questions(faq_path):
+    """
+    Pull the '### Qn: question' headings out of the FAQ file
+    
+    Returns:
+        List of dicts with 'question' and 'section' (the enclosing ## heading)
+    """
+    with open(faq_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    questions = []
+    section = ""
+    for m in HEADING_PATTERN.finditer(content):
+        level, title = len(m.group(1)), m.group(2)
+        if level == 2:
+            section = title
+        elif level == 3:
+            question = re.sub(r"^Q\d+:\s*", "", title)
+            if question.endswith("?"):
+                questions.append({'question': question, 'section': section})
+    return questions
+
+
 def save_chunks(chunks, output_file="chunked_data.txt"):
     """Save chunks to a text file for inspection"""
     with open(output_file, 'w', encoding='utf-8') as f:
@@ -82,6 +551,8 @@ def save_chunks(chunks, output_file="chunked_data.txt"):
                 total = chunk.get('total_chunks', len(chunks))
                 content = chunk.get('content', str(chunk))
                 f.write(f"Source: {source} | Chunk: {chunk_id+1}/{total}\n")
+                if chunk.get('heading_path'):
+                    f.write(f"Section: {chunk['heading_path']}\n")
             else:
                 content = str(chunk)
                 f.write(f"Chunk: {i+1}/{len(chunks)}\n")
@@ -100,7 +571,9 @@ if __name__ == "__main__":
     chunks = chunk_markdown_files(
         directory_path=dataset_path,
         chunk_size=1000,      # Adjust based on your needs
-        chunk_overlap=200     # Maintains context between chunks
+        chunk_overlap=200,    # Maintains context between chunks
+        splitter="markdown",  # Heading/table aware, sized in MiniLM tokens
+        max_tokens=256        # all-MiniLM-L6-v2 truncates longer input
     )
     
     print(f"\n📊 Total chunks created: {len(chunks)}")
@@ -108,6 +581,10 @@ if __name__ == "__main__":
     # Save chunks for inspection
     save_chunks(chunks)
     
+    # Save chunks in the binary store read by ingest and reward scoring
+    from chunk_store import ChunkStore
+    ChunkStore.write("chunks.fbcs", chunks)
+    
     # Display sample chunk
     if chunks:
         print("\n" + "="*80)
@@ -0,0 +1,124 @@
+"""
+conversation_summarizer.py
+Rolling Conversation Summarizer - Folds old turns into a running summary off the hot path
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from rate_limiter import BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+SUMMARY_PROMPT = """You maintain a running summary of a sales conversation between a visitor and Flowbotic's AI assistant.
+
+Update the summary with the new turns below. Keep every concrete fact about the visitor: name, company, industry, size, tools they use, problems, budget, plans or prices discussed, and what they asked for next. Drop greetings and small talk. Write at most 8 short bullet points.
+
+Current summary:
+{summary}
+
+New turns:
+{turns}
+
+Updated summary:"""
+
+
+def estimate_tokens(text):
+    """Cheap token estimate (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+class ConversationSummarizer:
+    """Keeps summary + recent turns within a token budget"""
+
+    def __init__(self, client, model_name="llama-3.1-8b-instant", token_budget=1500,
+                 keep_recent=6, token_counter=estimate_tokens, rate_limiter=None):
+        """
+        Args:
+            client: Groq-compatible client (client.chat.completions.create)
+            model_name: Small, fast model used for summarization
+            token_budget: Unsummarized history above this many tokens gets folded
+            keep_recent: Messages always kept verbatim
+            token_counter: Callable text -> token count
+            rate_limiter: Shared RateLimiter; summaries queue behind interactive turns
+        """
+        self.client = client
+        self.model_name = model_name
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.count_tokens = token_counter
+        self.rate_limiter = rate_limiter
+
+        self.summary = ""
+        self.summarized_upto = 0      # history[:summarized_upto] is in the summary
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self.pending = None
+        self.generation = 0           # bumped on reset to drop stale results
+
+    def recent(self, history):
+        """(summary, unsummarized history) for the next request"""
+        with self.lock:
+            return self.summary, history[self.summarized_upto:]
+
+    def maybe_schedule(self, history):
+        """Start a background fold when unsummarized history exceeds the budget"""
+        with self.lock:
+            if self.pending is not None and not self.pending.done():
+                return False
+            start = self.summarized_upto
+            unsummarized = history[start:]
+            tokens = sum(self.count_tokens(m['content']) for m in unsummarized)
+            if tokens <= self.token_budget or len(unsummarized) <= self.keep_recent:
+                return False
+
+            end = len(history) - self.keep_recent
+            turns = [dict(m) for m in history[start:end]]
+            summary = self.summary
+            generation = self.generation
+            self.pending = self.executor.submit(self._fold, summary, turns, end, generation)
+            return True
+
+    def _fold(self, summary, turns, end, generation):
+        """Summarize turns into the running summary (runs in the background)"""
+        transcript = "\n".join(f"{m['role'].upper()}: {m['content']}" for m in turns)
+        request = dict(
+            model=self.model_name,
+            messages=[{
+                "role": "user",
+                "content": SUMMARY_PROMPT.format(summary=summary or "(empty)", turns=transcript)
+            }],
+            temperature=0.2,
+            max_tokens=300
+        )
+        try:
+            if self.rate_limiter:
+                response = self.rate_limiter.create(self.client, priority=BACKGROUND, **request)
+            else:
+                response = self.client.chat.completions.create(**request)
+            new_summary = response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.warning(f"Conversation summarization failed: {e}")
+            return
+
+        with self.lock:
+            if generation != self.generation:
+                return
+            self.summary = new_summary
+            self.summarized_upto = end
+        logger.info(f"✓ Folded {len(turns)} messages into conversation summary")
+
+    def wait(self, timeout=None):
+        """Block until the in-flight fold (if any) finishes"""
+        pending = self.pending
+        if pending is not None:
+            pending.result(timeout=timeout)
+
+    def reset(self):
+        """Forget the summary (e.g. when history is cleared)"""
+        with self.lock:
+            self.summary = ""
+            self.summarized_upto = 0
+            self.generation += 1
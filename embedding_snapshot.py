@@ -0,0 +1,198 @@
+"""
+embedding_snapshot.py
+Embedding Snapshots - Export chunk vectors as memory-mappable .npy, bulk-load without re-embedding
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+
+EMBEDDINGS_FILE = "embeddings.npy"
+RECORDS_FILE = "records.jsonl"
+MANIFEST_FILE = "manifest.json"
+
+
+def embedding_model_name(embedding_function):
+    """Model name of a sentence-transformers embedding function (None if it can't be told)"""
+    for attribute in ('model_name', '_model_name'):
+        name = getattr(embedding_function, attribute, None)
+        if isinstance(name, str):
+            return name
+    return None
+
+
+def check_compatible(manifest, embedding_function):
+    """
+    Refuse to mix a snapshot with a different embedding model
+
+    Raises:
+        ValueError: if the model name (when both are known) or the vector
+                    dimension differ from the snapshot's
+    """
+    model = embedding_model_name(embedding_function)
+    if model and manifest.get('embedding_model') and model != manifest['embedding_model']:
+        raise ValueError(
+            f"Snapshot was embedded with {manifest['embedding_model']}, target uses {model}"
+        )
+    dim = len(embedding_function(["dimension check"])[0])
+    if dim != manifest['dim']:
+        raise ValueError(f"Snapshot vectors have {manifest['dim']} dims, target model produces {dim}")
+
+
+def export_snapshot(vectordb, snapshot_dir, batch_size=5000):
+    """
+    Write a collection's vectors, documents and metadata to a snapshot directory
+
+    Layout:
+        embeddings.npy  - (n, dim) float32, row i belongs to line i of records.jsonl
+        records.jsonl   - one {"id", "document", "metadata"} object per line
+        manifest.json   - count, dim, collection, model, normalized flag
+
+    Returns:
+        Number of exported chunks
+    """
+    total = vectordb.collection.count()
+    if total == 0:
+        raise ValueError(f"Collection '{vectordb.collection_name}' is empty; nothing to export")
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    # Write the matrix straight into a .npy on disk, batch by batch
+    dim = None
+    matrix = None
+    written = 0
+    with open(os.path.join(snapshot_dir, RECORDS_FILE), 'w', encoding='utf-8') as f:
+        for offset in range(0, total, batch_size):
+            data = vectordb.collection.get(
+                include=['embeddings', 'documents', 'metadatas'],
+                limit=batch_size, offset=offset
+            )
+            vectors = np.asarray(data['embeddings'], dtype=np.float32)
+            if matrix is None:
+                dim = vectors.shape[1]
+                matrix = np.lib.format.open_memmap(
+                    os.path.join(snapshot_dir, EMBEDDINGS_FILE),
+                    mode='w+', dtype=np.float32, shape=(total, dim)
+                )
+            matrix[written:written + len(vectors)] = vectors
+            written += len(vectors)
+
+            for chunk_id, doc, meta in zip(data['ids'], data['documents'], data['metadatas']):
+                f.write(json.dumps({'id': chunk_id, 'document': doc, 'metadata': meta},
+                                   ensure_ascii=False) + "\n")
+
+    matrix.flush()
+    norms = np.linalg.norm(matrix, axis=1)
+    normalized = bool(np.allclose(norms, 1.0, atol=1e-3))
+    del matrix
+
+    manifest = {
+        'count': written,
+        'dim': dim,
+        'collection': vectordb.collection_name,
+        'embedding_model': embedding_model_name(vectordb.embedding_function),
+        'normalized': normalized,
+        'created': datetime.now().isoformat()
+    }
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f"✓ Exported {written} chunks to {snapshot_dir}")
+    return written
+
+
+def load_snapshot(snapshot_dir, mmap=True):
+    """
+    Open a snapshot
+
+    Returns:
+        (embeddings, records, manifest) - embeddings is a read-only memmap when mmap=True
+    """
+    with open(os.path.join(snapshot_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    embeddings = np.load(
+        os.path.join(snapshot_dir, EMBEDDINGS_FILE),
+        mmap_mode='r' if mmap else None
+    )
+
+    with open(os.path.join(snapshot_dir, RECORDS_FILE), 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    if len(records) != embeddings.shape[0]:
+        raise ValueError(
+            f"Snapshot is inconsistent: {len(records)} records vs {embeddings.shape[0]} vectors"
+        )
+    if not records or embeddings.ndim != 2 or embeddings.shape[1] != manifest.get('dim'):
+        raise ValueError(f"Snapshot {snapshot_dir} is empty or has no valid embedding matrix")
+    return embeddings, records, manifest
+
+
+def import_snapshot(snapshot_dir, vectordb, batch_size=5000):
+    """
+    Bulk-load a snapshot into a VectorDBStore collection (no re-embedding)
+
+    Raises:
+        ValueError: if the snapshot was made with a different embedding model
+    """
+    embeddings, records, manifest = load_snapshot(snapshot_dir, mmap=True)
+    check_compatible(manifest, vectordb.embedding_function)
+
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch_size):
+        batch = records[offset:offset + batch_size]
+        vectordb.collection.upsert(
+            ids=[r['id'] for r in batch],
+            embeddings=np.asarray(embeddings[offset:offset + len(batch)]).tolist(),
+            documents=[r['document'] for r in batch],
+            metadatas=[r['metadata'] for r in batch]
+        )
+    elapsed = time.perf_counter() - start
+
+    print(f"✓ Imported {len(records)} chunks into {vectordb.collection_name} in {elapsed:.2f}s")
+    return len(records)
+
+
+def retriever_from_snapshot(snapshot_dir, embedding_function=None):
+    """Build a NumpyRetriever directly on the memory-mapped snapshot"""
+    from numpy_retriever import NumpyRetriever
+
+    embeddings, records, manifest = load_snapshot(snapshot_dir, mmap=True)
+    if embedding_function is not None:
+        check_compatible(manifest, embedding_function)
+    return NumpyRetriever(
+        embeddings,
+        [r['document'] for r in records],
+        [r['metadata'] for r in records],
+        [r['id'] for r in records],
+        embedding_function=embedding_function,
+        # Unit-length rows can be searched in place without a heap copy
+        normalized=manifest.get('normalized', False)
+    )
+
+
+if __name__ == "__main__":
+
+    from Vector_dataset import VectorDBStore
+
+    parser = argparse.ArgumentParser(description="Export/import embedding snapshots")
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("snapshot_dir")
+    parser.add_argument("--persist-directory", default="./chroma_db")
+    parser.add_argument("--collection", default="chatbot_knowledge")
+    args = parser.parse_args()
+
+    vectordb = VectorDBStore(
+        persist_directory=args.persist_directory,
+        collection_name=args.collection
+    )
+
+    if args.command == "export":
+        export_snapshot(vectordb, args.snapshot_dir)
+    else:
+        import_snapshot(args.snapshot_dir, vectordb)
+        vectordb.get_stats()
@@ -0,0 +1,328 @@
+"""
+fake_llm.py
+Offline LLM Backend - Deterministic stand-in for the Groq client plus an
+OpenAI-compatible HTTP stub server, for load tests and benchmarks without API credits
+
+    # In-process
+    bot = FlowboticsChatbotOptimized(api_key=None, llm_client=FakeLLMClient())
+
+    # Over HTTP (exercises the real Groq SDK, rate limiter and retries)
+    python fake_llm.py --port 8000 --ttft-ms 300 --rate-limit-rate 0.05
+    bot = FlowboticsChatbotOptimized(api_key="stub", base_url="http://127.0.0.1:8000")
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+
+FILLER_SENTENCES = [
+    "Flowbotic builds AI automation that fits the way your team already works.",
+    "Most clients see their first workflow live within two weeks.",
+    "Our chatbots handle routine questions so your team can focus on qualified leads.",
+    "Every plan includes onboarding and a dedicated setup session.",
+]
+FOLLOW_UPS = [
+    "What kind of business are you running?",
+    "Would you like to see how this works for your team?",
+    "Which tools are you using today?",
+]
+
+
+class FakeAPIError(Exception):
+    """Injected API failure, shaped like the Groq/OpenAI SDK errors (status_code, response.headers)"""
+
+    def __init__(self, status_code, message, headers=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.response = SimpleNamespace(status_code=status_code, headers=headers or {})
+
+
+def _namespace(value):
+    """JSON-style dicts -> attribute access, like the SDK's response models"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: _namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_namespace(v) for v in value]
+    return value
+
+
+def _sentences(text):
+    text = re.sub(r"[#*|>`_-]+", " ", text)
+    return [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if len(s.split()) >= 5]
+
+
+class FakeLLMClient:
+    """
+    Deterministic chat-completions client: client.chat.completions.create(...)
+
+    Answers are assembled from the retrieved context in the prompt, so the
+    RLHF reward and cascade checks see realistic text. The same request always
+    produces the same answer and latency (seeded per request), so runs are
+    comparable regardless of thread scheduling. Injected errors follow one
+    seeded sequence, so a retried request can succeed.
+    """
+
+    def __init__(self, tokens_per_second=250.0, ttft_ms=300.0, ttft_sigma=0.35,
+                 error_rate=0.0, rate_limit_rate=0.0, seed=0, sleep=True):
+        """
+        Args:
+            tokens_per_second: Generation speed after the first token
+            ttft_ms: Median time to first token
+            ttft_sigma: Log-normal spread of the time to first token
+            error_rate: Share of requests failing with a 500
+            rate_limit_rate: Share of requests failing with a 429 (with retry-after)
+            seed: Changes every answer, latency and injected error
+            sleep: False to skip all delays (pure overhead measurements)
+        """
+        self.tokens_per_second = tokens_per_second
+        self.ttft_ms = ttft_ms
+        self.ttft_sigma = ttft_sigma
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.sleep = sleep
+
+        self.lock = threading.Lock()
+        self.error_rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self.completion_tokens = 0
+
+        # Mirror the SDK's client.chat.completions.create(...) shape
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _rng(self, model, messages):
+        payload = json.dumps([self.seed, model, messages], sort_keys=True, ensure_ascii=False)
+        return random.Random(hashlib.sha256(payload.encode('utf-8')).digest())
+
+    def _answer(self, messages, rng):
+        """2-4 sentences lifted from the context (or filler) and a follow-up question"""
+        # Retrieved context is the trailing system message (see PromptBuilder)
+        has_context = len(messages) > 1 and messages[-1]['role'] == 'system'
+        pool = _sentences(messages[-1]['content']) if has_context else []
+        pool = pool or FILLER_SENTENCES
+        picked = rng.sample(pool, min(len(pool), rng.randint(2, 4)))
+        return " ".join(picked + [rng.choice(FOLLOW_UPS)])
+
+    def _wait(self, seconds):
+        if self.sleep and seconds > 0:
+            time.sleep(seconds)
+
+    def _maybe_fail(self):
+        with self.lock:
+            roll = self.error_rng.random()
+        if roll < self.rate_limit_rate:
+            raise FakeAPIError(429, "Rate limit reached (injected)", {
+                'retry-after': "1", 'x-ratelimit-remaining-tokens': "0", 'x-ratelimit-reset-tokens': "1s"
+            })
+        if roll < self.rate_limit_rate + self.error_rate:
+            raise FakeAPIError(500, "Internal server error (injected)")
+
+    def plan(self, model, messages, max_tokens=1024):
+        """
+        Decide one request: (tokens, finish_reason, ttft seconds, prompt tokens)
+
+        Raises:
+            FakeAPIError: when an error is injected for this request
+        """
+        rng = self._rng(model, messages)
+        with self.lock:
+            self.requests += 1
+        try:
+            self._maybe_fail()
+        except FakeAPIError:
+            with self.lock:
+                self.errors += 1
+            raise
+
+        words = self._answer(messages, rng).split()
+        finish_reason = "stop"
+        if len(words) > max_tokens:
+            words, finish_reason = words[:max_tokens], "length"
+        tokens = [w if i == 0 else f" {w}" for i, w in enumerate(words)]
+
+        ttft = self.ttft_ms / 1000 * rng.lognormvariate(0, self.ttft_sigma)
+        prompt_tokens = sum(len(m['content']) for m in messages) // 4
+        with self.lock:
+            self.completion_tokens += len(tokens)
+        return tokens, finish_reason, ttft, prompt_tokens
+
+    def create(self, model, messages, stream=False, max_tokens=1024, **params):
+        """chat.completions.create stand-in (sampling params are accepted and ignored)"""
+        tokens, finish_reason, ttft, prompt_tokens = self.plan(model, messages, max_tokens)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if stream:
+            return self._stream(completion_id, model, tokens, finish_reason, ttft)
+
+        self._wait(ttft + len(tokens) / self.tokens_per_second)
+        return _namespace(completion_body(completion_id, model, "".join(tokens),
+                                          finish_reason, prompt_tokens, len(tokens)))
+
+    def _stream(self, completion_id, model, tokens, finish_reason, ttft):
+        self._wait(ttft)
+        for i, token in enumerate(tokens):
+            if i:
+                self._wait(1 / self.tokens_per_second)
+            yield _namespace(chunk_body(completion_id, model, token))
+        yield _namespace(chunk_body(completion_id, model, None, finish_reason))
+
+    def get_stats(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'completion_tokens': self.completion_tokens
+        }
+
+
+def completion_body(completion_id, model, content, finish_reason, prompt_tokens, completion_tokens):
+    """OpenAI-compatible chat.completion JSON"""
+    return {
+        'id': completion_id,
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': finish_reason
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        }
+    }
+
+
+def chunk_body(completion_id, model, content, finish_reason=None):
+    """OpenAI-compatible chat.completion.chunk JSON"""
+    return {
+        'id': completion_id,
+        'object': 'chat.completion.chunk',
+        'created': int(time.time()),
+        'model': model,
+        'choices': [{'index': 0, 'delta': {'content': content}, 'finish_reason': finish_reason}]
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """POST .../chat/completions (Groq's /openai/v1 and plain /v1 paths), JSON or SSE"""
+
+    protocol_version = "HTTP/1.1"
+    client = None           # FakeLLMClient, set by make_server
+    tokens_per_minute = 60000
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}"}})
+            return
+
+        request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b"{}")
+        model = request.get('model', 'stub')
+        try:
+            tokens, finish_reason, ttft, prompt_tokens = self.client.plan(
+                model, request.get('messages', []), request.get('max_tokens') or 1024
+            )
+        except FakeAPIError as e:
+            self._send_json(e.status_code, {'error': {'message': e.message, 'type': 'injected'}},
+                            e.response.headers)
+            return
+
+        headers = {
+            'x-ratelimit-limit-tokens': str(self.tokens_per_minute),
+            'x-ratelimit-remaining-tokens': str(self.tokens_per_minute),
+            'x-ratelimit-remaining-requests': "14400",
+        }
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+        if not request.get('stream'):
+            self.client._wait(ttft + len(tokens) / self.client.tokens_per_second)
+            self._send_json(200, completion_body(completion_id, model, "".join(tokens), finish_reason,
+                                                 prompt_tokens, len(tokens)), headers)
+            return
+
+        # Server-sent events; the connection closes after [DONE]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+
+        self.client._wait(ttft)
+        for i, token in enumerate(tokens + [None]):
+            if i and token is not None:
+                self.client._wait(1 / self.client.tokens_per_second)
+            body = chunk_body(completion_id, model, token, None if token is not None else finish_reason)
+            self.wfile.write(f"data: {json.dumps(body)}\n\n".encode('utf-8'))
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def make_server(client=None, host="127.0.0.1", port=8000):
+    """OpenAI-compatible stub server backed by a FakeLLMClient (port 0 = any free port)"""
+    handler = type("BoundStubHandler", (StubHandler,), {'client': client or FakeLLMClient()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(client=None, host="127.0.0.1", port=0):
+    """Run the stub server in a background thread; returns (server, base_url)"""
+    server = make_server(client, host, port)
+    threading.Thread(target=server.serve_forever, daemon=True, name="fake-llm-server").start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--tokens-per-second", type=float, default=250.0)
+    parser.add_argument("--ttft-ms", type=float, default=300.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeLLMClient(
+        tokens_per_second=args.tokens_per_second,
+        ttft_ms=args.ttft_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed
+    )
+    server = make_server(fake, args.host, args.port)
+    print(f"✓ Stub LLM server on http://{args.host}:{args.port} "
+          f"(Groq SDK: base_url=http://{args.host}:{args.port})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n✓ Stopped")
@@ -0,0 +1,212 @@
+"""
+hybrid_retriever.py
+Hybrid Lexical + Vector Retrieval - Fuses Chroma's FTS index with dense search
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from Vector_dataset import VectorDBStore
+
+
+# Words that carry no retrieval signal for the lexical leg
+STOPWORDS = {
+    'what', 'how', 'why', 'when', 'where', 'which', 'who', 'does', 'do', 'is',
+    'are', 'the', 'a', 'an', 'and', 'or', 'for', 'of', 'to', 'in', 'on', 'with',
+    'can', 'you', 'your', 'our', 'my', 'me', 'i', 'it', 'its', 'be', 'about',
+    'there', 'any', 'have', 'has', 'offer', 'tell'
+}
+
+
+class HybridRetriever:
+    """Runs BM25 (SQLite FTS5) and vector search in parallel, fused with RRF"""
+
+    def __init__(self, vectordb: VectorDBStore, rrf_k: int = 60, candidates: int = 10):
+        """
+        Initialize hybrid retriever on top of an existing VectorDBStore
+
+        Args:
+            vectordb: Initialized VectorDBStore (shares its collection)
+            rrf_k: Reciprocal rank fusion constant
+            candidates: Number of hits fetched from each leg before fusion
+        """
+        self.vectordb = vectordb
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+
+        # Chroma keeps its full-text index in the same SQLite file
+        db_path = os.path.join(vectordb.persist_directory, "chroma.sqlite3")
+        self.conn = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self.lock = threading.Lock()
+        self.segment_id = self._find_metadata_segment(vectordb.collection_name)
+
+        self.executor = ThreadPoolExecutor(max_workers=2)
+
+        print(f"✓ Hybrid retriever initialized (RRF k={rrf_k})")
+
+    def _find_metadata_segment(self, collection_name):
+        """Find the metadata segment holding this collection's FTS rows"""
+        row = self.conn.execute(
+            """SELECT s.id FROM segments s
+               JOIN collections c ON s.collection = c.id
+               WHERE c.name = ? AND s.scope = 'METADATA'""",
+            (collection_name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def build_match_query(question):
+        """Turn a question into an FTS5 OR-query of quoted terms"""
+        terms = re.findall(r"[\w$%.-]+", question.lower())
+        # Trigram tokenizer needs at least 3 characters per term
+        terms = [t.strip('.-') for t in terms]
+        terms = [t for t in terms if len(t) >= 3 and t not in STOPWORDS]
+        if not terms:
+            return ""
+        return " OR ".join('"' + t.replace('"', '""') + '"' for t in dict.fromkeys(terms))
+
+    @staticmethod
+    def doc_types_from_where(where):
+        """Extract doc_type values from a routing filter (other keys are ignored)"""
+        if not where or 'doc_type' not in where:
+            return []
+        value = where['doc_type']
+        if isinstance(value, dict):
+            return list(value.get('$in', [value.get('$eq')] if '$eq' in value else []))
+        return [value]
+
+    def lexical_search(self, question, n_results=10, where=None):
+        """BM25-ranked chunk ids from Chroma's embedding_fulltext_search table"""
+        match_query = self.build_match_query(question)
+        if not match_query or not self.segment_id:
+            return []
+
+        sql = """SELECT e.embedding_id
+                 FROM embedding_fulltext_search f
+                 JOIN embeddings e ON e.id = f.rowid
+                 WHERE embedding_fulltext_search MATCH ? AND e.segment_id = ?"""
+        params = [match_query, self.segment_id]
+
+        doc_types = self.doc_types_from_where(where)
+        if doc_types:
+            sql += """ AND e.id IN (SELECT id FROM embedding_metadata
+                                    WHERE key = 'doc_type' AND string_value IN ({}))""".format(
+                ", ".join("?" * len(doc_types))
+            )
+            params.extend(doc_types)
+
+        sql += " ORDER BY bm25(embedding_fulltext_search) LIMIT ?"
+        params.append(n_results)
+
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [r[0] for r in rows]
+
+    def vector_search(self, question, n_results=10, query_embedding=None, where=None):
+        """Dense similarity search through the VectorDBStore"""
+        return self.vectordb.query(
+            question, n_results=n_results, query_embedding=query_embedding, where=where
+        )
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        return result, (time.perf_counter() - start) * 1000
+
+    def query(self, question, n_results=3, query_embedding=None, where=None):
+        """
+        Hybrid query with reciprocal rank fusion
+
+        Returns:
+            Chroma-style result dict (ids/documents/metadatas nested per query)
+            plus 'scores' (RRF) and 'timings' (milliseconds per stage)
+        """
+        start = time.perf_counter()
+
+        # Run both legs in parallel
+        lexical_future = self.executor.submit(
+            self._timed, self.lexical_search, question, self.candidates, where
+        )
+        vector_future = self.executor.submit(
+            self._timed, self.vector_search, question, self.candidates, query_embedding, where
+        )
+        lexical_ids, lexical_ms = lexical_future.result()
+        vector_results, vector_ms = vector_future.result()
+
+        # Reciprocal rank fusion
+        fuse_start = time.perf_counter()
+        vector_ids = vector_results['ids'][0] if vector_results['ids'] else []
+        scores = {}
+        for ranking in (lexical_ids, vector_ids):
+            for rank, chunk_id in enumerate(ranking):
+                scores[chunk_id] = scores.get(chunk_id, 0.0) + 1.0 / (self.rrf_k + rank + 1)
+        fused_ids = sorted(scores, key=scores.get, reverse=True)[:n_results]
+        fuse_ms = (time.perf_counter() - fuse_start) * 1000
+
+        # Collect documents - lexical-only hits need a fetch from the collection
+        fetch_start = time.perf_counter()
+        found = {
+            chunk_id: (doc, meta)
+            for chunk_id, doc, meta in zip(
+                vector_ids, vector_results['documents'][0], vector_results['metadatas'][0]
+            )
+        } if vector_ids else {}
+        missing = [chunk_id for chunk_id in fused_ids if chunk_id not in found]
+        if missing:
+            fetched = self.vectordb.collection.get(
+                ids=missing, include=['documents', 'metadatas']
+            )
+            for chunk_id, doc, meta in zip(fetched['ids'], fetched['documents'], fetched['metadatas']):
+                found[chunk_id] = (doc, meta)
+        fetch_ms = (time.perf_counter() - fetch_start) * 1000
+
+        fused_ids = [chunk_id for chunk_id in fused_ids if chunk_id in found]
+
+        return {
+            'ids': [fused_ids],
+            'documents': [[found[chunk_id][0] for chunk_id in fused_ids]],
+            'metadatas': [[found[chunk_id][1] for chunk_id in fused_ids]],
+            'scores': [[scores[chunk_id] for chunk_id in fused_ids]],
+            'query_embedding': vector_results['query_embedding'],
+            'timings': {
+                'lexical_ms': lexical_ms,
+                'vector_ms': vector_ms,
+                'fusion_ms': fuse_ms,
+                'fetch_ms': fetch_ms,
+                'total_ms': (time.perf_counter() - start) * 1000
+            }
+        }
+
+    def close(self):
+        """Release the SQLite connection and worker threads"""
+        self.executor.shutdown(wait=False)
+        self.conn.close()
+
+
+if __name__ == "__main__":
+
+    print("="*80)
+    print("HYBRID RETRIEVAL TEST")
+    print("="*80 + "\n")
+
+    vectordb = VectorDBStore(persist_directory="./chroma_db")
+    retriever = HybridRetriever(vectordb)
+
+    question = "Zapier webhook limit"
+    print(f"\nQuestion: {question}\n")
+
+    results = retriever.query(question, n_results=3)
+
+    for i, (doc, meta, score) in enumerate(zip(results['documents'][0], results['metadatas'][0], results['scores'][0])):
+        print(f"[{i+1}] {meta['source']} (RRF {score:.4f})")
+        print(f"    {doc[:150]}...\n")
+
+    print("Stage timings:")
+    for stage, ms in results['timings'].items():
+        print(f"  {stage}: {ms:.1f} ms")
@@ -0,0 +1,139 @@
+"""
+index_benchmark.py
+HNSW Index Benchmark - Recall@k vs. brute-force NumPy search and query latency per profile
+"""
+
+import argparse
+import json
+import os
+import time
+import uuid
+
+import chromadb
+import numpy as np
+
+from chunks_dataset import chunk_markdown_files, extract_faq_questions
+from Vector_dataset import INDEX_PROFILES, load_embedding_function
+
+
+def brute_force_top_k(corpus, queries, k, space="l2"):
+    """Exact nearest neighbours with NumPy, using the profile's distance"""
+    if space == "cosine":
+        corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        distances = 1.0 - queries @ corpus.T
+    elif space == "ip":
+        distances = 1.0 - queries @ corpus.T
+    else:
+        # Squared L2 without materializing the pairwise difference tensor
+        distances = (
+            (queries ** 2).sum(axis=1, keepdims=True)
+            - 2.0 * queries @ corpus.T
+            + (corpus ** 2).sum(axis=1)
+        )
+
+    top = np.argpartition(distances, kth=min(k, corpus.shape[0] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(distances, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def scale_corpus(embeddings, factor, noise=0.02, seed=0):
+    """Simulate a larger corpus by adding jittered copies of every vector"""
+    if factor <= 1:
+        return embeddings
+    rng = np.random.default_rng(seed)
+    copies = [embeddings]
+    for _ in range(factor - 1):
+        copies.append(embeddings + rng.normal(0, noise, embeddings.shape).astype(np.float32))
+    return np.vstack(copies)
+
+
+def benchmark_profile(name, profile, corpus, queries, k=3, batch_size=5000):
+    """Build an in-memory collection with a profile and measure recall/latency"""
+    client = chromadb.EphemeralClient()
+    collection = client.create_collection(
+        name=f"bench_{name}_{uuid.uuid4().hex[:8]}",
+        metadata=dict(profile) or None
+    )
+    ids = [str(i) for i in range(corpus.shape[0])]
+
+    # Build index
+    start = time.perf_counter()
+    for i in range(0, len(ids), batch_size):
+        collection.add(ids=ids[i:i + batch_size], embeddings=corpus[i:i + batch_size].tolist())
+    build_s = time.perf_counter() - start
+
+    # Exact ground truth in the same metric space
+    space = profile.get("hnsw:space", "l2")
+    exact = brute_force_top_k(corpus, queries, k, space=space)
+
+    # Query one at a time - that's what the chatbot does
+    latencies = []
+    hits = 0
+    for q, truth in zip(queries, exact):
+        start = time.perf_counter()
+        result = collection.query(query_embeddings=[q.tolist()], n_results=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        found = {int(i) for i in result['ids'][0]}
+        hits += len(found & set(truth.tolist()))
+
+    client.delete_collection(collection.name)
+
+    return {
+        'profile': name,
+        'settings': profile,
+        'corpus_size': int(corpus.shape[0]),
+        'k': k,
+        f'recall@{k}': hits / (len(queries) * k),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'build_s': build_s
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HNSW index profiles")
+    parser.add_argument("--dataset", default="./chatbot_dataset")
+    parser.add_argument("--profiles", nargs="+", default=list(INDEX_PROFILES))
+    parser.add_argument("-k", type=int, default=3)
+    parser.add_argument("--scale", type=int, default=1,
+                        help="Replicate the corpus N times (jittered) to simulate growth")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    print("="*80)
+    print("HNSW INDEX BENCHMARK")
+    print("="*80 + "\n")
+
+    # Embed corpus and queries once, reuse for every profile
+    chunks = chunk_markdown_files(args.dataset)
+    faq = extract_faq_questions(os.path.join(args.dataset, "frequently_asked_questions.md"))
+    questions = [q['question'] for q in faq]
+
+    embedding_function = load_embedding_function()
+    corpus = np.asarray(embedding_function([c['content'] for c in chunks]), dtype=np.float32)
+    corpus = scale_corpus(corpus, args.scale)
+    queries = np.asarray(embedding_function(questions), dtype=np.float32)
+
+    print(f"\n✓ Corpus: {corpus.shape[0]} vectors x {corpus.shape[1]} dims")
+    print(f"✓ Queries: {len(questions)} FAQ questions\n")
+
+    results = []
+    for name in args.profiles:
+        result = benchmark_profile(name, INDEX_PROFILES[name], corpus, queries, k=args.k)
+        results.append(result)
+
+    print(f"{'Profile':<12}{'Recall@' + str(args.k):>10}{'p50 ms':>10}{'p99 ms':>10}{'Build s':>10}")
+    print("-"*52)
+    for r in results:
+        print(f"{r['profile']:<12}{r[f'recall@{args.k}']:>10.3f}{r['p50_ms']:>10.2f}"
+              f"{r['p99_ms']:>10.2f}{r['build_s']:>10.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
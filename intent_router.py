@@ -0,0 +1,172 @@
+"""
+intent_router.py
+Fast-Path Intent Router - Answers greetings and canned questions locally from templates
+"""
+
+import re
+from itertools import count
+
+import numpy as np
+
+
+# Labelled intents: example utterances + template answers (Flowbotic's voice, 2-3 sentences).
+# Only "semantic" intents (chit-chat) answer near-misses; the rest answer exact matches only,
+# so "how much does the Enterprise plan cost for 10k conversations" still reaches the LLM.
+DEFAULT_INTENTS = {
+    "greeting": {
+        "semantic": True,
+        "examples": [
+            "hi", "hey", "hello", "hola", "yo", "sup", "wassup", "good morning",
+            "good afternoon", "good evening", "hi there", "hello there", "hey, how are you?"
+        ],
+        "responses": [
+            "Hello! Welcome to Flowbotic. How may I assist you today?",
+            "Hi there! I'm here to help. What can I do for you?",
+            "Good day! How can I help you with your business automation needs?"
+        ]
+    },
+    "thanks": {
+        "semantic": True,
+        "examples": [
+            "thanks", "thank you", "thanks a lot", "thank you so much", "appreciate it",
+            "great, thanks", "cheers"
+        ],
+        "responses": [
+            "You're welcome! Is there anything else I can help you with today?",
+            "Happy to help! Would you like to explore a specific automation for your business?"
+        ]
+    },
+    "goodbye": {
+        "semantic": True,
+        "examples": [
+            "bye", "goodbye", "see you", "see you later", "talk to you later", "that's all",
+            "have a nice day"
+        ],
+        "responses": [
+            "Thanks for chatting with Flowbotic! Feel free to come back anytime you have questions."
+        ]
+    },
+    "pricing_overview": {
+        "examples": [
+            "what are your prices", "how much does it cost", "what are your pricing plans",
+            "show me your plans", "how much is flowbotic", "what does it cost per month",
+            "pricing", "what plans do you offer"
+        ],
+        "responses": [
+            "We have three plans: Starter at $99/month (500 conversations), Professional at "
+            "$149/month (unlimited conversations, priority support), and Enterprise with custom "
+            "pricing. Are you a small team getting started, or do you expect high conversation volume?"
+        ]
+    },
+    "services_overview": {
+        "examples": [
+            "what services do you offer", "what does flowbotic do", "what can you do",
+            "what do you offer", "tell me about flowbotic", "what is flowbotic"
+        ],
+        "responses": [
+            "Flowbotic builds AI automation for businesses - chatbots, lead generation, customer "
+            "support automation and custom AI solutions. Are you mainly looking to engage "
+            "customers or to automate internal processes?"
+        ]
+    },
+}
+
+
+def normalize(text):
+    """Lowercase, strip punctuation and collapse whitespace"""
+    return re.sub(r"\s+", " ", re.sub(r"[^\w\s$']", " ", text.lower())).strip()
+
+
+class IntentRouter:
+    """Nearest-neighbour intent matching over labelled example embeddings"""
+
+    def __init__(self, embed_fn, intents=None, threshold=0.80, max_words=12):
+        """
+        Args:
+            embed_fn: Callable list[str] -> list of vectors (e.g. VectorDBStore.embed)
+            intents: Mapping intent -> {'examples': [...], 'responses': [...], 'semantic': bool};
+                only intents with 'semantic' set answer paraphrases, the rest need an exact match
+            threshold: Minimum cosine similarity to answer from a template
+            max_words: Longer messages always go to the LLM
+        """
+        self.embed_fn = embed_fn
+        self.intents = intents or DEFAULT_INTENTS
+        self.threshold = threshold
+        self.max_words = max_words
+        self.counter = count()
+
+        # Exact lookups answer the most common turns without embedding at all
+        self.exact = {}
+        labels, examples = [], []
+        for intent, spec in self.intents.items():
+            for example in spec['examples']:
+                self.exact[normalize(example)] = intent
+                labels.append(intent)
+                examples.append(example)
+        self.semantic = {intent for intent, spec in self.intents.items() if spec.get('semantic')}
+
+        matrix = np.asarray(embed_fn(examples), dtype=np.float32)
+        self.matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        self.labels = labels
+
+        self.hits = 0
+        self.misses = 0
+
+    def _respond(self, intent):
+        responses = self.intents[intent]['responses']
+        return responses[next(self.counter) % len(responses)]
+
+    def match_exact(self, message):
+        """Exact (normalized) example match - no embedding needed"""
+        intent = self.exact.get(normalize(message))
+        if intent is None:
+            return None
+        self.hits += 1
+        return intent, 1.0, self._respond(intent)
+
+    def match(self, message, query_embedding=None):
+        """
+        Route a message
+
+        Args:
+            message: User's message
+            query_embedding: The turn's embedding, if already computed
+
+        Returns:
+            (intent, score, response) when confident, otherwise None
+        """
+        exact = self.match_exact(message)
+        if exact:
+            return exact
+
+        key = normalize(message)
+        if not key or len(key.split()) > self.max_words:
+            self.misses += 1
+            return None
+
+        if query_embedding is None:
+            query_embedding = self.embed_fn([message])[0]
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        scores = self.matrix @ q
+        best = int(np.argmax(scores))
+        score = float(scores[best])
+
+        # A near-miss on a canned answer (pricing, services) is usually a more specific question
+        intent = self.labels[best]
+        if score < self.threshold or intent not in self.semantic:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return intent, score, self._respond(intent)
+
+    def get_stats(self):
+        """Fast-path hit rate"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -0,0 +1,199 @@
+"""
+kb_watcher.py
+Knowledge-Base Watcher - Re-chunks and upserts changed files into the live collection
+"""
+
+import logging
+import os
+import threading
+import time
+
+from chunks_dataset import SUPPORTED_EXTENSIONS, chunk_file
+
+# Optional: inotify/FSEvents through watchdog, polling otherwise
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    WATCHDOG_AVAILABLE = True
+except Exception:
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Watchdog event types that change content (watchdog >= 2.3 also reports opened/closed)
+CHANGE_EVENTS = ("created", "modified", "deleted", "moved")
+
+
+class KnowledgeBaseWatcher:
+    """Watches a dataset folder and keeps a VectorDBStore collection in sync"""
+
+    def __init__(self, vectordb, directory_path="./chatbot_dataset", debounce_seconds=1.0,
+                 poll_interval=1.0, use_watchdog=True, **chunk_options):
+        """
+        Args:
+            vectordb: VectorDBStore to update in place
+            directory_path: Folder to watch (recursively)
+            debounce_seconds: Quiet period after the last change before re-indexing
+            poll_interval: Scan interval for the polling fallback
+            use_watchdog: Use native file events when watchdog is installed
+            **chunk_options: splitter, chunk_size, chunk_overlap, max_tokens
+        """
+        self.vectordb = vectordb
+        self.directory_path = directory_path
+        self.debounce_seconds = debounce_seconds
+        self.poll_interval = poll_interval
+        self.use_watchdog = use_watchdog and WATCHDOG_AVAILABLE
+        self.chunk_options = chunk_options or {'splitter': "markdown"}
+
+        self.pending = {}            # relative filename -> time of last change
+        self.syncing = set()         # files being re-chunked right now (their reads are not changes)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.observer = None
+        self.snapshot = {}
+        self.updates = 0
+
+    def _relative(self, path):
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.directory_path))
+
+    def _is_tracked(self, path):
+        name = os.path.basename(path)
+        return name.lower().endswith(SUPPORTED_EXTENSIONS) and not name.startswith(".")
+
+    def notify(self, path):
+        """Record a change; the file is processed once changes settle"""
+        if self._is_tracked(path):
+            name = self._relative(path)
+            with self.lock:
+                if name not in self.syncing:
+                    self.pending[name] = time.monotonic()
+
+    def _scan(self):
+        """mtime/size of every tracked file (polling fallback)"""
+        state = {}
+        for root, _, filenames in os.walk(self.directory_path):
+            for name in filenames:
+                path = os.path.join(root, name)
+                if self._is_tracked(path):
+                    try:
+                        stat = os.stat(path)
+                        state[self._relative(path)] = (stat.st_mtime_ns, stat.st_size)
+                    except FileNotFoundError:
+                        pass
+        return state
+
+    def _poll_loop(self):
+        while not self.stop_event.wait(self.poll_interval):
+            current = self._scan()
+            changed = {
+                name for name in set(current) | set(self.snapshot)
+                if current.get(name) != self.snapshot.get(name)
+            }
+            self.snapshot = current
+            for name in changed:
+                self.notify(os.path.join(self.directory_path, name))
+
+    def _process_loop(self):
+        tick = min(self.debounce_seconds, 0.25)
+        while not self.stop_event.wait(tick):
+            now = time.monotonic()
+            with self.lock:
+                ready = [f for f, t in self.pending.items() if now - t >= self.debounce_seconds]
+                for filename in ready:
+                    del self.pending[filename]
+                self.syncing.update(ready)
+            for filename in ready:
+                try:
+                    self.sync_file(filename)
+                finally:
+                    with self.lock:
+                        self.syncing.discard(filename)
+
+    def sync_file(self, filename):
+        """Re-chunk one file and swap its chunks in the collection"""
+        start = time.perf_counter()
+        path = os.path.join(self.directory_path, filename)
+
+        try:
+            if not os.path.exists(path):
+                self.vectordb.delete_source(filename)
+                logger.info(f"✓ Knowledge base: removed {filename}")
+                return
+
+            result = chunk_file(self.directory_path, filename, **self.chunk_options)
+            if result['error']:
+                logger.warning(f"✗ Knowledge base: {filename} - {result['error']}")
+                return
+
+            stored, removed = self.vectordb.replace_source(filename, result['chunks'])
+            self.updates += 1
+            logger.info(
+                f"✓ Knowledge base: {filename} -> {stored} chunks upserted, {removed} removed "
+                f"({(time.perf_counter() - start) * 1000:.0f} ms)"
+            )
+        except Exception as e:
+            logger.warning(f"✗ Knowledge base sync failed for {filename}: {e}")
+
+    def start(self):
+        """Start watching in background daemon threads"""
+        self.stop_event.clear()
+
+        if self.use_watchdog:
+            watcher = self
+
+            class _Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if event.is_directory or event.event_type not in CHANGE_EVENTS:
+                        return
+                    watcher.notify(event.src_path)
+                    if getattr(event, 'dest_path', None):
+                        watcher.notify(event.dest_path)
+
+            self.observer = Observer()
+            self.observer.schedule(_Handler(), self.directory_path, recursive=True)
+            self.observer.start()
+        else:
+            self.snapshot = self._scan()
+            self.threads.append(threading.Thread(target=self._poll_loop, daemon=True))
+
+        self.threads.append(threading.Thread(target=self._process_loop, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+        mode = "watchdog events" if self.use_watchdog else f"polling every {self.poll_interval}s"
+        logger.info(f"✓ Watching {self.directory_path} ({mode})")
+        return self
+
+    def stop(self):
+        """Stop watching"""
+        self.stop_event.set()
+        if self.observer:
+            self.observer.stop()
+            self.observer.join()
+            self.observer = None
+        for thread in self.threads:
+            thread.join(timeout=2)
+        self.threads = []
+
+
+if __name__ == "__main__":
+
+    from Vector_dataset import VectorDBStore
+
+    logging.basicConfig(level=logging.INFO)
+
+    print("="*80)
+    print("KNOWLEDGE BASE WATCH MODE")
+    print("="*80 + "\n")
+
+    vectordb = VectorDBStore(persist_directory="./chroma_db")
+    watcher = KnowledgeBaseWatcher(vectordb, "./chatbot_dataset").start()
+
+    print("Edit files in ./chatbot_dataset - press Ctrl+C to stop\n")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        watcher.stop()
+        vectordb.get_stats()
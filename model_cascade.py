@@ -0,0 +1,192 @@
+"""
+model_cascade.py
+Model Cascade - A small, fast model answers first; a cheap local check decides
+whether the turn escalates to the large model
+"""
+
+import logging
+import re
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+# Expected answer length -> max_tokens (the system prompt asks for 2-4 sentences)
+SHORT_ANSWER_TOKENS = 160
+DETAILED_ANSWER_TOKENS = 360
+ESCALATION_TOKEN_FACTOR = 2
+
+DETAIL_PATTERN = re.compile(
+    r"\b(list|all|steps?|compare|comparison|difference|differences|explain|walk me through|"
+    r"details?|in depth|breakdown|examples?)\b", re.IGNORECASE
+)
+
+# Questions that go straight to the large model
+COMPLEX_PATTERN = re.compile(
+    r"\b(custom|integrat\w*|enterprise|security|compliance|gdpr|hipaa|contract|sla|"
+    r"migrat\w*|architecture|on-prem\w*)\b", re.IGNORECASE
+)
+
+HEDGE_PATTERN = re.compile(
+    r"\b(i'?m not sure|i am not sure|i don'?t know|i do not know|i cannot|i can'?t help|"
+    r"as an ai|i don'?t have (?:that|this|enough) information|unclear)\b", re.IGNORECASE
+)
+
+FIGURE_PATTERN = re.compile(r"\$\s?\d[\d,]*(?:\.\d+)?|\b\d+(?:\.\d+)?\s?%")
+
+
+def figures(text):
+    """Prices and percentages, normalized ("$1,499" -> "$1499")"""
+    return {re.sub(r"[\s,]", "", f) for f in FIGURE_PATTERN.findall(text)}
+
+
+def max_tokens_for(question, large=False):
+    """Output budget from the expected answer length (with headroom for the large model)"""
+    budget = DETAILED_ANSWER_TOKENS if DETAIL_PATTERN.search(question) else SHORT_ANSWER_TOKENS
+    return budget * ESCALATION_TOKEN_FACTOR if large else budget
+
+
+class ModelCascade:
+    """Small model first, large model when the local check fails"""
+
+    def __init__(self, small_model="llama-3.1-8b-instant", large_model="llama-3.3-70b-versatile",
+                 reward_model=None, min_reward=-0.2, max_direct_words=40):
+        """
+        Args:
+            small_model: Fast model tried first
+            large_model: Model used on escalation (and for complex questions)
+            reward_model: Optional RLHF RewardModel; answers scoring below
+                          min_reward escalate
+            min_reward: Reward threshold in [-1, 1]
+            max_direct_words: Longer questions go straight to the large model
+        """
+        self.small_model = small_model
+        self.large_model = large_model
+        self.reward_model = reward_model
+        self.min_reward = min_reward
+        self.max_direct_words = max_direct_words
+
+        self.outcomes = Counter()
+
+    def max_tokens_for(self, question):
+        """Output budget from the expected answer length"""
+        return max_tokens_for(question)
+
+    def goes_direct(self, question):
+        """Long or complex questions skip the small model"""
+        return len(question.split()) > self.max_direct_words or bool(COMPLEX_PATTERN.search(question))
+
+    def escalation_reason(self, question, response, context, finish_reason=None, system_prompt=""):
+        """
+        Cheap local check of a small-model answer
+
+        Args:
+            context: Retrieved context
+            system_prompt: Instructions sent with the request; figures quoted
+                           there (e.g. list prices) count as grounded too
+
+        Returns:
+            Reason string when the answer should escalate, otherwise None
+        """
+        if not response or not response.strip():
+            return "empty"
+        if finish_reason == "length":
+            return "truncated"
+        if HEDGE_PATTERN.search(response):
+            return "hedging"
+        # Prices/percentages must come from the retrieved context or the instructions
+        if context and figures(response) - figures(context) - figures(system_prompt):
+            return "ungrounded_figures"
+        if self.reward_model is not None:
+            reward, _ = self.reward_model.score(question, response, context)
+            if reward < self.min_reward:
+                return "low_reward"
+        return None
+
+    def _params(self, params, max_tokens, large):
+        params = dict(params)
+        params['max_tokens'] = max_tokens * ESCALATION_TOKEN_FACTOR if large else max_tokens
+        return params
+
+    def _try_small(self, create, messages, question, context, max_tokens, params):
+        """Small-model answer, or None when the turn should escalate"""
+        try:
+            response = create(model=self.small_model, messages=messages,
+                              **self._params(params, max_tokens, large=False))
+        except Exception as e:
+            logger.warning(f"Small model failed, escalating: {e}")
+            self.outcomes['escalated:error'] += 1
+            return None
+
+        choice = response.choices[0]
+        answer = choice.message.content or ""
+        system_prompt = "\n".join(m['content'] for m in messages if m['role'] == "system")
+        reason = self.escalation_reason(question, answer, context, getattr(choice, 'finish_reason', None),
+                                        system_prompt=system_prompt)
+        if reason:
+            logger.info(f"Cascade escalation: {reason}")
+            self.outcomes[f'escalated:{reason}'] += 1
+            return None
+
+        self.outcomes['small'] += 1
+        return answer
+
+    def answer(self, create, messages, question, context="", **params):
+        """
+        Complete one turn through the cascade
+
+        Args:
+            create: chat.completions.create-compatible callable
+            messages: Request messages
+            question: User's message
+            context: Retrieved context (used by the grounding check)
+            **params: Sampling parameters (temperature, top_p, ...)
+
+        Returns:
+            Answer text
+        """
+        max_tokens = self.max_tokens_for(question)
+
+        if self.goes_direct(question):
+            self.outcomes['direct'] += 1
+        else:
+            answer = self._try_small(create, messages, question, context, max_tokens, params)
+            if answer is not None:
+                return answer
+
+        response = create(model=self.large_model, messages=messages,
+                          **self._params(params, max_tokens, large=True))
+        return response.choices[0].message.content
+
+    def stream(self, create, messages, question, context="", **params):
+        """
+        Streaming variant of answer()
+
+        The small model's answer is checked before any of it is shown, so a
+        rejected draft never reaches the user; escalations stream from the
+        large model.
+        """
+        max_tokens = self.max_tokens_for(question)
+
+        if self.goes_direct(question):
+            self.outcomes['direct'] += 1
+        else:
+            answer = self._try_small(create, messages, question, context, max_tokens, params)
+            if answer is not None:
+                yield answer
+                return
+
+        stream = create(model=self.large_model, messages=messages, stream=True,
+                        **self._params(params, max_tokens, large=True))
+        for chunk in stream:
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def get_stats(self):
+        """Share of turns answered by the small model, and why others escalated"""
+        total = sum(self.outcomes.values())
+        return {
+            'turns': total,
+            'small_model_rate': self.outcomes['small'] / total if total else 0.0,
+            'outcomes': dict(self.outcomes)
+        }
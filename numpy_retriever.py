@@ -0,0 +1,231 @@
+"""
+numpy_retriever.py
+In-Memory Brute-Force Retriever - Exact search over a contiguous float32 matrix
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+class NumpyRetriever:
+    """Exact cosine search with one matrix-vector product + argpartition"""
+
+    def __init__(self, embeddings, documents, metadatas, ids, embedding_function=None,
+                 normalized=False):
+        """
+        Args:
+            embeddings: (n, dim) array-like of chunk vectors (may be a np.memmap)
+            documents: Chunk texts, aligned with embeddings
+            metadatas: Chunk metadata dicts, aligned with embeddings
+            ids: Chunk ids, aligned with embeddings
+            embedding_function: Used to embed questions when no embedding is passed
+            normalized: Set when rows are already unit length (skips the copy)
+        """
+        matrix = embeddings if isinstance(embeddings, np.memmap) else np.asarray(embeddings)
+        if not normalized:
+            matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            matrix = matrix / np.maximum(norms, 1e-12)
+
+        self.matrix = matrix
+        self.documents = list(documents)
+        self.metadatas = list(metadatas)
+        self.ids = list(ids)
+        self.embedding_function = embedding_function
+
+        print(f"✓ NumPy retriever loaded: {self.matrix.shape[0]} chunks x {self.matrix.shape[1]} dims")
+
+    @classmethod
+    def from_vectordb(cls, vectordb, mmap_path=None, **kwargs):
+        """
+        Load every vector from a VectorDBStore collection
+
+        Args:
+            vectordb: Initialized VectorDBStore
+            mmap_path: Optional .npy path (outside Chroma's directory) - the normalized
+                       matrix is cached there and memory-mapped instead of kept on
+                       the heap; reused across starts while the collection is unchanged
+            **kwargs: Extra constructor arguments (e.g. codec for QuantizedRetriever)
+        """
+        if mmap_path:
+            data = vectordb.collection.get(include=['documents', 'metadatas'])
+            matrix = cls._cached_matrix(vectordb, mmap_path, data['ids'])
+        else:
+            data = vectordb.collection.get(include=['embeddings', 'documents', 'metadatas'])
+            matrix = cls._normalize(data['embeddings'])
+
+        return cls(
+            matrix, data['documents'], data['metadatas'], data['ids'],
+            embedding_function=vectordb.embedding_function, normalized=True, **kwargs
+        )
+
+    @staticmethod
+    def _normalize(embeddings):
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+    @classmethod
+    def _cached_matrix(cls, vectordb, mmap_path, ids):
+        """
+        Memory-mapped normalized matrix at mmap_path, rebuilt only when stale
+
+        The file is reused while the collection's ids and embedding model match
+        its manifest (mmap_path + '.json'). A rebuild is written to a temp file
+        and renamed into place, so other processes mapping the old file keep
+        a consistent copy.
+        """
+        from embedding_snapshot import embedding_model_name
+
+        ids_digest = hashlib.sha1("\n".join(ids).encode('utf-8')).hexdigest()
+        manifest = {
+            'count': len(ids),
+            'ids_sha1': ids_digest,
+            'embedding_model': embedding_model_name(vectordb.embedding_function)
+        }
+        manifest_path = mmap_path + ".json"
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                if json.load(f) == manifest:
+                    return np.load(mmap_path, mmap_mode='r')
+        except (OSError, ValueError):
+            pass
+
+        data = vectordb.collection.get(include=['embeddings'])
+        if list(data['ids']) != list(ids):
+            raise ValueError("Collection changed while building the retriever matrix; retry")
+        matrix = cls._normalize(data['embeddings'])
+
+        directory = os.path.dirname(os.path.abspath(mmap_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy", dir=directory)
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, matrix)
+        os.replace(tmp_path, mmap_path)
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        return np.load(mmap_path, mmap_mode='r')
+
+    def embed(self, texts):
+        """Embed a list of texts with the shared embedding function"""
+        if self.embedding_function is None:
+            raise ValueError("No embedding function - pass query_embedding instead")
+        embeddings = self.embedding_function(list(texts))
+        return [[float(x) for x in emb] for emb in embeddings]
+
+    def _matches(self, meta, where):
+        """Evaluate a (small) subset of Chroma's where syntax against one metadata dict"""
+        for key, condition in where.items():
+            if key == '$and':
+                if not all(self._matches(meta, c) for c in condition):
+                    return False
+            elif key == '$or':
+                if not any(self._matches(meta, c) for c in condition):
+                    return False
+            elif isinstance(condition, dict):
+                value = meta.get(key)
+                if '$eq' in condition and value != condition['$eq']:
+                    return False
+                if '$ne' in condition and value == condition['$ne']:
+                    return False
+                if '$in' in condition and value not in condition['$in']:
+                    return False
+                if '$nin' in condition and value in condition['$nin']:
+                    return False
+            elif meta.get(key) != condition:
+                return False
+        return True
+
+    def _mask(self, where):
+        """Boolean row mask for a metadata filter"""
+        return np.fromiter(
+            (self._matches(meta or {}, where) for meta in self.metadatas),
+            dtype=bool, count=len(self.metadatas)
+        )
+
+    def query(self, question, n_results=3, query_embedding=None, where=None):
+        """
+        Same contract as VectorDBStore.query, answered by exact search
+
+        Returns:
+            Chroma-style result dict with cosine distances, the query embedding
+            and 'timings' in milliseconds
+        """
+        start = time.perf_counter()
+        if query_embedding is None:
+            query_embedding = self.embed([question])[0]
+        embed_ms = (time.perf_counter() - start) * 1000
+
+        search_start = time.perf_counter()
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        scores = self.matrix @ q
+        if where:
+            candidates = np.flatnonzero(self._mask(where))
+            scores = scores[candidates]
+        else:
+            candidates = None
+
+        k = min(n_results, scores.shape[0])
+        if k == 0:
+            top = np.empty(0, dtype=np.int64)
+        elif k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+        else:
+            top = np.argsort(-scores)
+
+        rows = candidates[top] if candidates is not None else top
+        search_ms = (time.perf_counter() - search_start) * 1000
+
+        return {
+            'ids': [[self.ids[i] for i in rows]],
+            'documents': [[self.documents[i] for i in rows]],
+            'metadatas': [[self.metadatas[i] for i in rows]],
+            'distances': [[float(1.0 - s) for s in scores[top]]],
+            'query_embedding': query_embedding,
+            'timings': {'embed_ms': embed_ms, 'search_ms': search_ms}
+        }
+
+    def get_stats(self):
+        """Corpus size and matrix footprint"""
+        count = self.matrix.shape[0]
+        mapped = isinstance(self.matrix, np.memmap)
+        print(f"📊 NumPy retriever: {count} chunks, {self.matrix.nbytes / 1024:.0f} KB"
+              f"{' (memory-mapped)' if mapped else ''}")
+        return count
+
+
+if __name__ == "__main__":
+
+    from Vector_dataset import VectorDBStore
+
+    print("="*80)
+    print("NUMPY RETRIEVER vs CHROMA")
+    print("="*80 + "\n")
+
+    vectordb = VectorDBStore(persist_directory="./chroma_db")
+    retriever = NumpyRetriever.from_vectordb(vectordb)
+    retriever.get_stats()
+
+    question = "What services does Flowbotic offer?"
+    query_embedding = vectordb.embed([question])[0]
+
+    runs = 200
+    start = time.perf_counter()
+    for _ in range(runs):
+        chroma_results = vectordb.query(question, n_results=3, query_embedding=query_embedding)
+    chroma_ms = (time.perf_counter() - start) * 1000 / runs
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        numpy_results = retriever.query(question, n_results=3, query_embedding=query_embedding)
+    numpy_ms = (time.perf_counter() - start) * 1000 / runs
+
+    print(f"\nChroma: {chroma_ms:.3f} ms/query -> {chroma_results['ids'][0]}")
+    print(f"NumPy:  {numpy_ms:.3f} ms/query -> {numpy_results['ids'][0]}")
@@ -0,0 +1,360 @@
+"""
+profiler.py
+Runtime Profiler - Sampling (collapsed stacks for flamegraphs) or cProfile capture of
+decorated entry points, toggled at runtime per request or for a time window
+
+    @profiled("chat")
+    def chat(...): ...
+
+    runtime_profiler.profile_requests(5)              # next 5 calls, one file each
+    runtime_profiler.profile_for(30, mode="cprofile")  # every call for 30 s, one file
+
+    FLOWBOTICS_PROFILE="requests:5" / "seconds:30" / "seconds:30:cprofile"
+
+    curl -X POST 'http://127.0.0.1:9100/profile?requests=5'   # via telemetry.serve_metrics
+    curl -X POST 'http://127.0.0.1:9100/profile?seconds=30&mode=cprofile'
+
+Collapsed stacks (*.collapsed) load in flamegraph.pl, speedscope and inferno;
+cProfile output (*.prof) in snakeviz or flameprof. While nothing is armed a
+decorated call costs one attribute check.
+
+cProfile can only trace one call at a time, so in cprofile mode calls that
+overlap a running capture are skipped (and counted); use sample mode to see
+concurrent sessions.
+"""
+
+import cProfile
+import functools
+import inspect
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MODES = ("sample", "cprofile")
+
+
+class SamplingProfiler:
+    """Samples thread stacks from sys._current_frames() on a background thread"""
+
+    def __init__(self, interval=0.005, thread_ids=None):
+        """
+        Args:
+            interval: Seconds between samples
+            thread_ids: Set of thread ids to sample (shared, may change while
+                        running); None samples every thread
+        """
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.samples = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def collapse(frame):
+        """Root-to-leaf 'function (file:line)' frames joined with ';'"""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                root = names.get(thread_id, str(thread_id))
+                self.samples[f"{root};{self.collapse(frame)}"] += 1
+            self.sample_count += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="sampling-profiler")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def write(self, path):
+        """Brendan Gregg's collapsed format: 'frame;frame;frame count' per line"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        return path
+
+
+class _Capture:
+    """One output file: a single request, or every decorated call in a time window"""
+
+    def __init__(self, label, mode, interval):
+        self.label = label
+        self.mode = mode
+        self.threads = set()
+        self.stats = None
+        self.sampler = None
+        if mode == "sample":
+            self.sampler = SamplingProfiler(interval, thread_ids=self.threads).start()
+
+    def add_profile(self, profile):
+        import pstats
+        if self.stats is None:
+            self.stats = pstats.Stats(profile)
+        else:
+            self.stats.add(profile)
+
+    def finish(self, output_dir):
+        """Write the capture; returns the path (None if nothing was captured)"""
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        base = os.path.join(output_dir, f"{self.label}-{stamp}-{os.getpid()}")
+        os.makedirs(output_dir, exist_ok=True)
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            if not self.sampler.samples:
+                return None
+            return self.sampler.write(f"{base}.collapsed")
+        if self.stats is None:
+            return None
+        self.stats.dump_stats(f"{base}.prof")
+        return f"{base}.prof"
+
+
+class RuntimeProfiler:
+    """Arms @profiled entry points per request or for a time window"""
+
+    def __init__(self, output_dir="profiles", interval=0.005):
+        """
+        Args:
+            output_dir: Where profiles are written
+            interval: Sampling interval in seconds (sample mode)
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+
+        self.armed = False            # the only thing checked while disabled
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.pending = 0              # remaining per-request captures
+        self.pending_mode = "sample"
+        self.window = None            # (_Capture, deadline) for profile_for
+        self.cprofile_busy = False    # cProfile captures one call at a time
+        self.skipped = 0              # calls not captured because cProfile was busy
+        self.written = []
+
+    def _rearm(self):
+        self.armed = self.pending > 0 or self.window is not None
+
+    def profile_requests(self, count=1, mode="sample"):
+        """Profile the next `count` decorated calls (one file per call)"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}' (use one of {MODES})")
+        with self.lock:
+            self.pending = count
+            self.pending_mode = mode
+            self._rearm()
+        logger.info(f"✓ Profiling the next {count} request(s) ({mode})")
+
+    def profile_for(self, seconds, mode="sample", label="window"):
+        """Profile every decorated call for `seconds` into one file"""
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode '{mode}' (use one of {MODES})")
+        with self.lock:
+            if self.window is not None:
+                return
+            self.window = (_Capture(label, mode, self.interval), time.monotonic() + seconds)
+            self._rearm()
+        timer = threading.Timer(seconds, self._close_window)
+        timer.daemon = True
+        timer.start()
+        logger.info(f"✓ Profiling for {seconds}s ({mode})")
+
+    def _close_window(self):
+        with self.lock:
+            window, self.window = self.window, None
+            self._rearm()
+        if window:
+            self._write(window[0])
+
+    def _write(self, capture):
+        path = capture.finish(self.output_dir)
+        if path:
+            self.written.append(path)
+            logger.info(f"✓ Profile written to {path}")
+        if capture.mode == "cprofile" and self.skipped:
+            logger.info(f"{self.skipped} overlapping call(s) were not captured (cProfile is single-call)")
+            self.skipped = 0
+
+    def _begin(self, label):
+        """Claim a capture for one decorated call; returns a token for _resume/_end (or None)"""
+        with self.lock:
+            if self.window is not None and time.monotonic() < self.window[1]:
+                capture, single = self.window[0], False
+                mode = capture.mode
+            elif self.pending > 0:
+                capture, single = None, True
+                mode = self.pending_mode
+            else:
+                self._rearm()
+                return None
+
+            # Only one cProfile capture can run at a time; a busy profiler
+            # leaves the pending request for the next call
+            if mode == "cprofile":
+                if self.cprofile_busy:
+                    self.skipped += 1
+                    return None
+                self.cprofile_busy = True
+            if single:
+                self.pending -= 1
+            self._rearm()
+
+        if single:
+            capture = _Capture(label, mode, self.interval)
+
+        profile = None
+        if mode == "cprofile":
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+                profile.disable()
+            except ValueError as e:   # another profiler is active (e.g. a debugger)
+                logger.warning(f"cProfile unavailable: {e}")
+                with self.lock:
+                    self.cprofile_busy = False
+                    if single:
+                        self.pending += 1
+                        self._rearm()
+                return None
+        return capture, single, profile
+
+    def _resume(self, token):
+        """Capture the calling thread until _suspend (once per call, or per generator step)"""
+        capture, _, profile = token
+        self.local.active = True
+        if profile is not None:
+            profile.enable()
+        else:
+            capture.threads.add(threading.get_ident())
+
+    def _suspend(self, token):
+        capture, _, profile = token
+        self.local.active = False
+        if profile is not None:
+            profile.disable()
+        else:
+            capture.threads.discard(threading.get_ident())
+
+    def _end(self, token):
+        capture, single, profile = token
+        if profile is not None:
+            with self.lock:
+                capture.add_profile(profile)
+                self.cprofile_busy = False
+
+        if single:
+            self._write(capture)
+
+    def arm(self, requests=None, seconds=None, mode="sample"):
+        """
+        Arm from a runtime trigger (e.g. POST /profile?requests=5 on the metrics server)
+
+        Returns:
+            Short description of what was armed
+        """
+        if requests is not None:
+            self.profile_requests(int(requests), mode=mode)
+            return f"profiling the next {int(requests)} request(s) ({mode})"
+        if seconds is not None:
+            self.profile_for(float(seconds), mode=mode)
+            return f"profiling for {float(seconds)}s ({mode})"
+        raise ValueError("pass requests=N or seconds=N")
+
+    def configure_from_env(self, variable="FLOWBOTICS_PROFILE"):
+        """Arm from e.g. FLOWBOTICS_PROFILE='requests:5' or 'seconds:30:cprofile'"""
+        spec = os.environ.get(variable)
+        if not spec:
+            return
+        try:
+            kind, amount, *rest = spec.split(":")
+            mode = rest[0] if rest else "sample"
+            if kind == "requests":
+                self.profile_requests(int(amount), mode=mode)
+            elif kind == "seconds":
+                self.profile_for(float(amount), mode=mode)
+            else:
+                raise ValueError(kind)
+        except ValueError:
+            logger.warning(f"Ignoring {variable}={spec!r} (expected 'requests:N' or 'seconds:N[:cprofile]')")
+
+
+# Shared by every decorated function in the process
+runtime_profiler = RuntimeProfiler()
+runtime_profiler.configure_from_env()
+
+
+def profiled(label, profiler=None):
+    """
+    Capture calls to the decorated function while profiling is armed
+
+    Nested decorated calls (chat -> get_relevant_context) join the outer
+    capture. Generator functions are captured one step at a time until
+    exhausted or closed, so the consumer's code between steps (and a stream
+    that is abandoned half-way) is never attributed to the capture.
+    """
+    def decorate(fn):
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                active = profiler or runtime_profiler
+                if not active.armed or getattr(active.local, 'active', False):
+                    return (yield from fn(*args, **kwargs))
+                token = active._begin(label)
+                if token is None:
+                    return (yield from fn(*args, **kwargs))
+                generator = fn(*args, **kwargs)
+                try:
+                    sent = None
+                    while True:
+                        active._resume(token)
+                        try:
+                            item = generator.send(sent)
+                        except StopIteration as stop:
+                            return stop.value
+                        finally:
+                            active._suspend(token)
+                        sent = yield item
+                finally:
+                    generator.close()
+                    active._end(token)
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            active = profiler or runtime_profiler
+            if not active.armed or getattr(active.local, 'active', False):
+                return fn(*args, **kwargs)
+            token = active._begin(label)
+            if token is None:
+                return fn(*args, **kwargs)
+            active._resume(token)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                active._suspend(token)
+                active._end(token)
+        return wrapper
+    return decorate
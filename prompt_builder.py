@@ -0,0 +1,113 @@
+"""
+prompt_builder.py
+Prefix-Stable Prompt Builder - Keeps the prompt prefix byte-identical across turns
+so provider-side prompt caching can reuse it
+
+Layout of every request:
+    1. system prompt + static facts       (never changes)
+    2. running conversation summary       (changes only when old turns are folded)
+    3. conversation history, canonical    (only grows; window moves in steps)
+    4. latest user message                (raw text)
+    5. retrieved context                  (volatile, always last)
+"""
+
+import json
+
+
+CONTEXT_TEMPLATE = """Use this information to answer the latest question:
+
+{context}
+
+Answer naturally without mentioning the context."""
+
+SUMMARY_TEMPLATE = """Summary of the earlier conversation:
+{summary}"""
+
+
+def canonical_message(role, content):
+    """Normalized message so identical turns serialize to identical bytes"""
+    content = "\n".join(line.rstrip() for line in content.replace("\r\n", "\n").split("\n"))
+    return {"role": role, "content": content.strip()}
+
+
+class PromptBuilder:
+    """Builds chat messages with a stable prefix and tracks prefix reuse"""
+
+    def __init__(self, system_prompt, static_facts="", max_history_messages=10, window_step=6):
+        """
+        Args:
+            system_prompt: Static system prompt
+            static_facts: Extra static facts appended to the system prompt
+            max_history_messages: Most history messages sent per request
+            window_step: The history window drops old messages in blocks of
+                         this size, so the prefix stays put for several turns
+                         instead of shifting every turn
+        """
+        content = system_prompt if not static_facts else f"{system_prompt}\n\n{static_facts}"
+        self.prefix = [canonical_message("system", content)]
+        self.max_history_messages = max_history_messages
+        self.window_step = max(1, window_step)
+
+        self.previous = ""
+        self.requests = 0
+        self.reused_chars = 0
+        self.total_chars = 0
+
+    def history_window(self, history):
+        """Recent history, with a start index that only moves in window_step blocks"""
+        overflow = len(history) - self.max_history_messages
+        if overflow <= 0:
+            return history
+        start = -(-overflow // self.window_step) * self.window_step
+        return history[start:]
+
+    def build(self, history, user_message, context="", summary=""):
+        """
+        Assemble messages for one request
+
+        Args:
+            history: Previous turns as {"role", "content"} dicts (raw, no context)
+            user_message: Latest user message
+            context: Retrieved context for this turn only
+            summary: Running summary of turns no longer in history
+
+        Returns:
+            List of messages for the chat completions API
+        """
+        messages = list(self.prefix)
+        if summary:
+            messages.append(canonical_message("system", SUMMARY_TEMPLATE.format(summary=summary)))
+        messages.extend(canonical_message(m["role"], m["content"]) for m in self.history_window(history))
+        messages.append(canonical_message("user", user_message))
+        if context:
+            messages.append(canonical_message("system", CONTEXT_TEMPLATE.format(context=context)))
+
+        self.record(messages)
+        return messages
+
+    def record(self, messages):
+        """Update the prefix-reuse metric against the previous request"""
+        serialized = json.dumps(messages, ensure_ascii=False, separators=(",", ":"))
+
+        # Longest common prefix by binary search (slice compares run in C)
+        low, high = 0, min(len(serialized), len(self.previous))
+        while low < high:
+            mid = (low + high + 1) // 2
+            if serialized[:mid] == self.previous[:mid]:
+                low = mid
+            else:
+                high = mid - 1
+        common = low
+
+        self.requests += 1
+        self.reused_chars += common
+        self.total_chars += len(serialized)
+        self.previous = serialized
+        return common / len(serialized) if serialized else 0.0
+
+    def get_stats(self):
+        """Prefix-reuse ratio: share of prompt characters shared with the previous request"""
+        return {
+            'requests': self.requests,
+            'prefix_reuse_ratio': self.reused_chars / self.total_chars if self.total_chars else 0.0
+        }
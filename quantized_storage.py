@@ -0,0 +1,297 @@
+"""
+quantized_storage.py
+Compact Embedding Storage - float16 / int8 / PCA codes with exact full-precision re-rank
+"""
+
+import time
+
+import numpy as np
+
+from numpy_retriever import NumpyRetriever
+
+
+# Rows scored per block, bounds the float32 scratch space for compact codes
+SCORE_BLOCK = 8192
+
+
+class Float16Codec:
+    """Half precision - 2x smaller, practically lossless for unit vectors"""
+
+    name = "float16"
+    overhead_bytes = 0
+
+    def fit(self, matrix):
+        return self
+
+    def encode(self, matrix):
+        return np.asarray(matrix, dtype=np.float16)
+
+    def prepare_query(self, q):
+        return q
+
+    def score(self, codes, q):
+        return codes.astype(np.float32) @ q
+
+
+class Int8Codec:
+    """Symmetric per-dimension scalar quantization - 4x smaller"""
+
+    name = "int8"
+
+    def fit(self, matrix):
+        self.scale = np.maximum(np.abs(matrix).max(axis=0), 1e-12) / 127.0
+        self.scale = self.scale.astype(np.float32)
+        return self
+
+    @property
+    def overhead_bytes(self):
+        """float32 scale per dimension, kept next to the codes"""
+        return int(self.scale.nbytes)
+
+    def encode(self, matrix):
+        return np.clip(np.rint(matrix / self.scale), -127, 127).astype(np.int8)
+
+    def prepare_query(self, q):
+        # Fold the scale into the query: (codes * scale) . q == codes . (scale * q)
+        return q * self.scale
+
+    def score(self, codes, q):
+        return codes.astype(np.float32) @ q
+
+
+class PCACodec:
+    """
+    Project onto the top principal components (float16 codes)
+
+    A corpus of n rows has at most min(n, dim) components, so small corpora
+    get fewer dimensions than requested (e.g. 85 on an 85-chunk knowledge
+    base); `dims` is lowered to what was actually fitted.
+    """
+
+    def __init__(self, dims=128):
+        self.dims = dims
+        self.name = f"pca{dims}"
+
+    def fit(self, matrix):
+        matrix = np.asarray(matrix, dtype=np.float32)
+        self.mean = matrix.mean(axis=0)
+        _, _, vt = np.linalg.svd(matrix - self.mean, full_matrices=False)
+        if vt.shape[0] < self.dims:
+            print(f"⚠️  {self.name}: only {vt.shape[0]} components available "
+                  f"from {matrix.shape[0]} rows")
+            self.dims = vt.shape[0]
+        self.components = np.ascontiguousarray(vt[:self.dims], dtype=np.float32)
+        return self
+
+    @property
+    def overhead_bytes(self):
+        """Projection matrix and mean, needed to encode queries"""
+        return int(self.components.nbytes + self.mean.nbytes)
+
+    def encode(self, matrix):
+        return ((np.asarray(matrix, dtype=np.float32) - self.mean) @ self.components.T).astype(np.float16)
+
+    def prepare_query(self, q):
+        # x.q ~= ((x - mean) W^T).(W q) + mean.q ; the constant doesn't change ranking
+        return self.components @ q
+
+    def score(self, codes, q):
+        return codes.astype(np.float32) @ q
+
+
+CODECS = {
+    "float16": Float16Codec,
+    "int8": Int8Codec,
+    "pca128": lambda: PCACodec(128),
+    "pca64": lambda: PCACodec(64),
+}
+
+
+def get_codec(codec):
+    """Codec instance from a name in CODECS or an existing codec"""
+    return CODECS[codec]() if isinstance(codec, str) else codec
+
+
+class QuantizedRetriever(NumpyRetriever):
+    """
+    Searches compact codes, then re-ranks the top candidates exactly
+
+    Keep the full-precision matrix memory-mapped (from_vectordb(mmap_path=...)
+    or embedding_snapshot.py) so only the re-ranked rows are ever paged in.
+    Without re-ranking the full-precision matrix is dropped after encoding.
+    """
+
+    def __init__(self, embeddings, documents, metadatas, ids, codec="int8",
+                 embedding_function=None, normalized=False, rerank_candidates=20):
+        """
+        Args:
+            codec: "float16", "int8", "pca128", "pca64" or a codec instance
+            rerank_candidates: Compact-score hits re-scored at full precision
+                               (0 disables re-ranking and frees the float32 matrix)
+        """
+        super().__init__(embeddings, documents, metadatas, ids,
+                         embedding_function=embedding_function, normalized=normalized)
+
+        self.codec = get_codec(codec)
+        self.rerank_candidates = rerank_candidates
+
+        # Encode block by block so a memory-mapped matrix is never fully loaded
+        self.codec.fit(self._fit_sample())
+        self.codes = np.concatenate([
+            self.codec.encode(self.matrix[i:i + SCORE_BLOCK])
+            for i in range(0, self.matrix.shape[0], SCORE_BLOCK)
+        ]) if self.matrix.shape[0] else np.zeros((0, 0), dtype=np.float16)
+
+        print(f"✓ Quantized storage ({self.codec.name}): "
+              f"{self.matrix.nbytes / 1024:.0f} KB -> {self.compact_bytes / 1024:.0f} KB")
+
+        # Only the re-rank reads full-precision rows; don't keep a heap copy for nothing
+        if not self.rerank_candidates:
+            self.matrix = None
+
+    @property
+    def compact_bytes(self):
+        """Codes plus the codec's own tables (scales / projection)"""
+        return int(self.codes.nbytes + self.codec.overhead_bytes)
+
+    def _fit_sample(self, max_rows=20000):
+        """Rows used to fit codec statistics"""
+        if self.matrix.shape[0] <= max_rows:
+            return np.asarray(self.matrix, dtype=np.float32)
+        rows = np.random.default_rng(0).choice(self.matrix.shape[0], max_rows, replace=False)
+        return np.asarray(self.matrix[np.sort(rows)], dtype=np.float32)
+
+    def approximate_scores(self, q):
+        """Similarity of every row to q, computed on the compact codes"""
+        prepared = self.codec.prepare_query(q)
+        return np.concatenate([
+            self.codec.score(self.codes[i:i + SCORE_BLOCK], prepared)
+            for i in range(0, self.codes.shape[0], SCORE_BLOCK)
+        ]) if self.codes.shape[0] else np.zeros(0, dtype=np.float32)
+
+    @staticmethod
+    def _top(scores, k):
+        k = min(k, scores.shape[0])
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        if k < scores.shape[0]:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(scores.shape[0])
+        return top[np.argsort(-scores[top])]
+
+    def query(self, question, n_results=3, query_embedding=None, where=None, rerank=True):
+        """Same contract as VectorDBStore.query; distances are exact when re-ranked"""
+        start = time.perf_counter()
+        if query_embedding is None:
+            query_embedding = self.embed([question])[0]
+        embed_ms = (time.perf_counter() - start) * 1000
+
+        search_start = time.perf_counter()
+        q = np.asarray(query_embedding, dtype=np.float32)
+        q = q / max(float(np.linalg.norm(q)), 1e-12)
+
+        scores = self.approximate_scores(q)
+        candidates = np.flatnonzero(self._mask(where)) if where else np.arange(scores.shape[0])
+        scores = scores[candidates]
+
+        if rerank and self.rerank_candidates and self.matrix is not None:
+            # Exact re-rank of the shortlist at full precision
+            shortlist = candidates[self._top(scores, max(self.rerank_candidates, n_results))]
+            exact = np.asarray(self.matrix[np.sort(shortlist)], dtype=np.float32) @ q
+            shortlist = np.sort(shortlist)
+            order = self._top(exact, n_results)
+            rows, final_scores = shortlist[order], exact[order]
+        else:
+            order = self._top(scores, n_results)
+            rows, final_scores = candidates[order], scores[order]
+        search_ms = (time.perf_counter() - search_start) * 1000
+
+        return {
+            'ids': [[self.ids[i] for i in rows]],
+            'documents': [[self.documents[i] for i in rows]],
+            'metadatas': [[self.metadatas[i] for i in rows]],
+            'distances': [[float(1.0 - s) for s in final_scores]],
+            'query_embedding': query_embedding,
+            'timings': {'embed_ms': embed_ms, 'search_ms': search_ms}
+        }
+
+    def get_stats(self):
+        """Corpus size and footprint of the codes (and of the re-rank matrix, if any)"""
+        count = self.codes.shape[0]
+        line = f"📊 Quantized retriever ({self.codec.name}): {count} chunks, {self.compact_bytes / 1024:.0f} KB"
+        if self.matrix is not None:
+            mapped = isinstance(self.matrix, np.memmap)
+            line += (f" + {self.matrix.nbytes / 1024:.0f} KB float32 for re-rank"
+                     f"{' (memory-mapped)' if mapped else ''}")
+        print(line)
+        return count
+
+
+def storage_report(embeddings, query_embeddings, codecs=("float16", "int8", "pca128", "pca64"), k=3):
+    """
+    Memory saved vs. recall lost for each codec, relative to exact float32 search
+
+    Returns:
+        List of dicts with bytes, compression ratio and recall@k with/without re-rank
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    n = embeddings.shape[0]
+    placeholders = [""] * n
+    ids = [str(i) for i in range(n)]
+
+    exact = NumpyRetriever(embeddings, placeholders, [{}] * n, ids)
+    truth = [set(exact.query(None, k, query_embedding=q)['ids'][0]) for q in query_embeddings]
+
+    report = []
+    for codec in codecs:
+        retriever = QuantizedRetriever(embeddings, placeholders, [{}] * n, ids, codec=codec)
+        recall = {}
+        for rerank in (False, True):
+            hits = sum(
+                len(set(retriever.query(None, k, query_embedding=q, rerank=rerank)['ids'][0]) & t)
+                for q, t in zip(query_embeddings, truth)
+            )
+            recall[rerank] = hits / (len(truth) * k)
+        report.append({
+            'codec': retriever.codec.name,
+            'dims': int(retriever.codes.shape[1]),
+            'float32_bytes': int(exact.matrix.nbytes),
+            'compact_bytes': retriever.compact_bytes,
+            'compression': exact.matrix.nbytes / max(retriever.compact_bytes, 1),
+            f'recall@{k}': recall[False],
+            f'recall@{k}_reranked': recall[True]
+        })
+    return report
+
+
+if __name__ == "__main__":
+
+    import os
+
+    from chunks_dataset import chunk_markdown_files, extract_faq_questions
+    from Vector_dataset import load_embedding_function
+
+    print("="*80)
+    print("COMPACT EMBEDDING STORAGE REPORT")
+    print("="*80 + "\n")
+
+    dataset_path = "./chatbot_dataset"
+    chunks = chunk_markdown_files(dataset_path)
+    questions = [q['question'] for q in extract_faq_questions(
+        os.path.join(dataset_path, "frequently_asked_questions.md")
+    )]
+
+    embedding_function = load_embedding_function()
+    embeddings = np.asarray(embedding_function([c['content'] for c in chunks]), dtype=np.float32)
+    query_embeddings = np.asarray(embedding_function(questions), dtype=np.float32)
+
+    k = 3
+    report = storage_report(embeddings, query_embeddings, k=k)
+
+    print(f"\n{'Codec':<10}{'Dims':>6}{'KB':>10}{'Ratio':>8}{'Recall':>10}{'Re-ranked':>12}")
+    print("-"*56)
+    print(f"{'float32':<10}{embeddings.shape[1]:>6}{embeddings.nbytes / 1024:>10.1f}{1.0:>8.1f}{1.0:>10.3f}{1.0:>12.3f}")
+    for r in report:
+        print(f"{r['codec']:<10}{r['dims']:>6}{r['compact_bytes'] / 1024:>10.1f}{r['compression']:>8.1f}"
+              f"{r[f'recall@{k}']:>10.3f}{r[f'recall@{k}_reranked']:>12.3f}")
@@ -0,0 +1,107 @@
+"""
+query_router.py
+Keyword Router - Narrows retrieval to the relevant document types before ANN search
+"""
+
+import re
+
+
+# Keywords that point a question at a document type (see chunks_dataset.DOC_TYPES)
+DOC_TYPE_KEYWORDS = {
+    "pricing": [
+        "price", "pricing", "cost", "costs", "plan", "plans", "starter", "professional",
+        "enterprise", "$", "month", "monthly", "annual", "discount", "fee", "fees",
+        "trial", "billing", "pay", "cheap", "expensive", "budget"
+    ],
+    "integration": [
+        "integrate", "integration", "integrations", "connect", "whatsapp", "slack",
+        "salesforce", "hubspot", "zapier", "webhook", "webhooks", "google sheets",
+        "shopify", "teams", "instagram", "messenger", "crm", "setup", "api key"
+    ],
+    "technical": [
+        "api", "latency", "uptime", "architecture", "model", "llm", "security",
+        "encryption", "gdpr", "hipaa", "soc", "infrastructure", "rate limit",
+        "specification", "specs", "hosting", "server", "database"
+    ],
+    "case_study": [
+        "case study", "case studies", "success", "results", "roi", "customer story",
+        "example", "examples", "client", "clients", "testimonial"
+    ],
+    "services": [
+        "service", "services", "offer", "offering", "automation", "chatbot",
+        "lead generation", "support automation", "solutions"
+    ],
+}
+
+# FAQ chunks answer a bit of everything, so they stay in every routed search
+ALWAYS_INCLUDE = ["faq"]
+
+
+class KeywordRouter:
+    """Cheap keyword classifier mapping a question to document types"""
+
+    def __init__(self, keywords=None, always_include=None, max_types=2):
+        """
+        Args:
+            keywords: Mapping of doc_type -> list of trigger keywords
+            always_include: Doc types added to every routed search
+            max_types: Route only when at most this many types match
+        """
+        self.keywords = keywords or DOC_TYPE_KEYWORDS
+        self.always_include = ALWAYS_INCLUDE if always_include is None else always_include
+        self.max_types = max_types
+
+        # Single words match on token boundaries, phrases/symbols as substrings
+        self.patterns = {
+            doc_type: [
+                re.compile(rf"\b{re.escape(kw)}\b") if kw.isalnum() else kw
+                for kw in kws
+            ]
+            for doc_type, kws in self.keywords.items()
+        }
+
+    def route(self, question):
+        """
+        Score doc types by keyword hits
+
+        Returns:
+            List of doc types to search (empty list means search everything)
+        """
+        text = question.lower()
+        scores = {}
+        for doc_type, patterns in self.patterns.items():
+            hits = sum(
+                1 for p in patterns
+                if (p.search(text) if hasattr(p, 'search') else p in text)
+            )
+            if hits:
+                scores[doc_type] = hits
+
+        # Ambiguous or unmatched questions are not worth narrowing
+        if not scores or len(scores) > self.max_types:
+            return []
+
+        doc_types = sorted(scores, key=scores.get, reverse=True)
+        return doc_types + [t for t in self.always_include if t not in doc_types]
+
+    def route_filter(self, question):
+        """Chroma `where` filter for the routed doc types (None = no filter)"""
+        doc_types = self.route(question)
+        if not doc_types:
+            return None
+        if len(doc_types) == 1:
+            return {"doc_type": doc_types[0]}
+        return {"doc_type": {"$in": doc_types}}
+
+
+if __name__ == "__main__":
+
+    router = KeywordRouter()
+
+    for question in [
+        "How much does the Professional plan cost?",
+        "Can I connect the bot to WhatsApp?",
+        "What services does Flowbotic offer?",
+        "Tell me something interesting",
+    ]:
+        print(f"{question}\n  -> {router.route_filter(question)}")
@@ -0,0 +1,298 @@
+"""
+rate_limiter.py
+Groq Rate Limiter - Process-wide token buckets (requests/min + tokens/min) with
+priority queueing and header-driven, jittered retries
+"""
+
+import heapq
+import logging
+import random
+import re
+import threading
+import time
+from itertools import count
+
+logger = logging.getLogger(__name__)
+
+
+# Priorities: lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Per-model limits (Groq free tier); response headers correct these at runtime
+DEFAULT_LIMITS = {
+    "llama-3.3-70b-versatile": {"requests_per_minute": 30, "tokens_per_minute": 12000},
+    "llama-3.1-8b-instant": {"requests_per_minute": 30, "tokens_per_minute": 6000},
+}
+FALLBACK_LIMITS = {"requests_per_minute": 30, "tokens_per_minute": 6000}
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+
+
+def parse_duration(value):
+    """Seconds from a rate-limit header value ("7.66s", "2m59.56s", "120ms" or "12")"""
+    if value is None:
+        return None
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    parts = DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def estimate_request_tokens(messages, max_tokens):
+    """Upper-bound token cost of a request (~4 characters per prompt token + max output)"""
+    prompt_chars = sum(len(m.get('content') or "") for m in messages)
+    return prompt_chars // 4 + len(messages) * 4 + max_tokens
+
+
+def error_details(error):
+    """(status code, lower-cased headers) from a Groq/OpenAI SDK exception"""
+    status = getattr(error, 'status_code', None)
+    response = getattr(error, 'response', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    headers = getattr(response, 'headers', None) or {}
+    return status, {k.lower(): v for k, v in headers.items()}
+
+
+def is_retryable(error, status):
+    """Rate limits, server errors, timeouts and dropped connections"""
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    name = type(error).__name__
+    return isinstance(error, (ConnectionError, TimeoutError)) or "Connection" in name or "Timeout" in name
+
+
+class TokenBucket:
+    """Continuously refilling bucket; the level may go negative to record overuse"""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        """Seconds until `amount` is available (0 if it is now)"""
+        missing = min(amount, self.capacity) - self.level
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount):
+        self.level -= amount
+
+    def clamp(self, remaining):
+        """Never believe we have more than the server says is left"""
+        self.level = min(self.level, float(remaining))
+
+
+class RateLimiter:
+    """Shared limiter for one model: callers queue by priority, then FIFO"""
+
+    def __init__(self, requests_per_minute=30, tokens_per_minute=6000,
+                 max_retries=4, base_delay=1.0, max_delay=30.0):
+        """
+        Args:
+            requests_per_minute: Request bucket size / refill per minute
+            tokens_per_minute: Token bucket size / refill per minute
+            max_retries: Retries after the first attempt
+            base_delay: First backoff step when the server gives no retry-after
+            max_delay: Backoff ceiling
+        """
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.condition = threading.Condition()
+        self.waiting = []             # heap of (priority, sequence)
+        self.sequence = count()
+        self.paused_until = 0.0       # set by 429s / exhausted quotas, applies to everyone
+
+        self.granted = 0
+        self.retries = 0
+        self.failures = 0
+        self.wait_seconds = 0.0
+
+    def _wait_time(self, tokens, now):
+        self.requests.refill(now)
+        self.tokens.refill(now)
+        return max(self.paused_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def acquire(self, tokens, priority=INTERACTIVE):
+        """
+        Block until this caller is first in line and both buckets have room
+
+        Returns:
+            Seconds spent waiting
+        """
+        started = time.monotonic()
+        with self.condition:
+            entry = (priority, next(self.sequence))
+            heapq.heappush(self.waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self.waiting[0] == entry:
+                        wait = self._wait_time(tokens, now)
+                        if wait <= 0:
+                            heapq.heappop(self.waiting)
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            self.granted += 1
+                            break
+                        self.condition.wait(timeout=wait)
+                    else:
+                        self.condition.wait()
+            except BaseException:
+                self.waiting.remove(entry)
+                heapq.heapify(self.waiting)
+                raise
+            finally:
+                self.condition.notify_all()
+
+        waited = time.monotonic() - started
+        self.wait_seconds += waited
+        return waited
+
+    def pause(self, seconds):
+        """Hold every caller for `seconds` (e.g. after a 429)"""
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.condition.notify_all()
+
+    def update_from_headers(self, headers):
+        """Sync the buckets with Groq's x-ratelimit-* / retry-after headers"""
+        headers = {k.lower(): v for k, v in headers.items()}
+        with self.condition:
+            now = time.monotonic()
+            self.tokens.refill(now)
+
+            remaining_tokens = headers.get('x-ratelimit-remaining-tokens')
+            if remaining_tokens is not None:
+                self.tokens.clamp(float(remaining_tokens))
+
+            # Groq's request headers count the daily quota; only act when it is gone
+            remaining_requests = headers.get('x-ratelimit-remaining-requests')
+            if remaining_requests is not None and float(remaining_requests) <= 0:
+                reset = parse_duration(headers.get('x-ratelimit-reset-requests'))
+                if reset:
+                    self.paused_until = max(self.paused_until, now + reset)
+
+            retry_after = parse_duration(headers.get('retry-after'))
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+
+            self.condition.notify_all()
+
+    def reconcile(self, estimated, actual):
+        """Return over-reserved tokens once real usage is known"""
+        with self.condition:
+            self.tokens.level = min(self.tokens.capacity, self.tokens.level + estimated - actual)
+            self.condition.notify_all()
+
+    def retry_delay(self, attempt, headers):
+        """Server-given delay (plus a little jitter) or full-jitter exponential backoff"""
+        retry_after = parse_duration(headers.get('retry-after'))
+        if retry_after is None:
+            retry_after = parse_duration(headers.get('x-ratelimit-reset-tokens'))
+        if retry_after is not None:
+            return retry_after + random.uniform(0, 0.25 * retry_after + 0.1)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def _send(self, client, kwargs):
+        """One API call; reads rate-limit headers when the SDK exposes them"""
+        raw_api = getattr(client.chat.completions, 'with_raw_response', None)
+        if raw_api is None:
+            return client.chat.completions.create(**kwargs)
+        raw = raw_api.create(**kwargs)
+        self.update_from_headers(raw.headers)
+        return raw.parse()
+
+    def create(self, client, priority=INTERACTIVE, **kwargs):
+        """
+        client.chat.completions.create(**kwargs) under the limiter, with retries
+
+        Streams are only retried if the request itself fails; errors after
+        the first token reach the caller unchanged.
+
+        Args:
+            client: Groq-compatible client
+            priority: INTERACTIVE or BACKGROUND
+            **kwargs: Arguments for chat.completions.create
+
+        Returns:
+            The completion (or stream)
+        """
+        estimated = estimate_request_tokens(kwargs.get('messages', []), kwargs.get('max_tokens', 1024))
+
+        for attempt in range(self.max_retries + 1):
+            self.acquire(estimated, priority)
+            try:
+                response = self._send(client, kwargs)
+            except Exception as e:
+                status, headers = error_details(e)
+                if headers:
+                    self.update_from_headers(headers)
+                if attempt >= self.max_retries or not is_retryable(e, status):
+                    self.failures += 1
+                    raise
+
+                delay = self.retry_delay(attempt, headers)
+                self.retries += 1
+                logger.warning(f"Groq request failed ({status or type(e).__name__}), "
+                               f"retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                if status == 429:
+                    self.pause(delay)    # everyone backs off, not just this caller
+                else:
+                    time.sleep(delay)
+                continue
+
+            usage = getattr(response, 'usage', None)
+            if usage is not None and getattr(usage, 'total_tokens', None):
+                self.reconcile(estimated, usage.total_tokens)
+            return response
+
+    def get_stats(self):
+        """Queue depth, bucket levels and retry counters"""
+        with self.condition:
+            now = time.monotonic()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            return {
+                'queued': len(self.waiting),
+                'requests_available': round(self.requests.level, 2),
+                'tokens_available': round(self.tokens.level),
+                'paused_for': round(max(0.0, self.paused_until - now), 2),
+                'granted': self.granted,
+                'retries': self.retries,
+                'failures': self.failures,
+                'avg_wait_seconds': self.wait_seconds / self.granted if self.granted else 0.0
+            }
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def limiter_for(model_name, **limits):
+    """Process-wide limiter for a model (all sessions share the same buckets)"""
+    with _limiters_lock:
+        limiter = _limiters.get(model_name)
+        if limiter is None:
+            options = dict(DEFAULT_LIMITS.get(model_name, FALLBACK_LIMITS))
+            options.update(limits)
+            limiter = RateLimiter(**options)
+            _limiters[model_name] = limiter
+        return limiter
@@ -0,0 +1,158 @@
+"""
+request_coalescer.py
+Single-Flight Request Coalescing - Identical concurrent requests share one upstream LLM call
+"""
+
+import hashlib
+import json
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    """One in-flight upstream call; tokens are buffered so late joiners can replay them"""
+
+    def __init__(self):
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.result = None
+        self.waiters = 1
+        self.condition = threading.Condition()
+
+    def push(self, token):
+        with self.condition:
+            self.tokens.append(token)
+            self.condition.notify_all()
+
+    def finish(self, error=None, result=None):
+        with self.condition:
+            self.done = True
+            self.error = error
+            self.result = result
+            self.condition.notify_all()
+
+    def read(self):
+        """Yield every token from the start, blocking for new ones until done"""
+        index = 0
+        while True:
+            with self.condition:
+                while index == len(self.tokens) and not self.done:
+                    self.condition.wait()
+                new_tokens = self.tokens[index:]
+                index = len(self.tokens)
+                finished = self.done and index == len(self.tokens)
+                error = self.error
+            for token in new_tokens:
+                yield token
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """Process-wide registry of in-flight LLM calls keyed by request content"""
+
+    def __init__(self):
+        self.flights = {}
+        self.lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+
+    @staticmethod
+    def make_key(*parts):
+        """Stable hash of the request parts (model, question, context, ...)"""
+        payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _join(self, key):
+        """
+        Return (flight, is_leader)
+
+        Keys are (mode, request key): a call() flight has only a result and a
+        stream() flight only tokens, so the two never share a flight.
+        """
+        with self.lock:
+            flight = self.flights.get(key)
+            if flight is not None:
+                flight.waiters += 1
+                self.followers += 1
+                return flight, False
+            flight = _Flight()
+            self.flights[key] = flight
+            self.leaders += 1
+            return flight, True
+
+    def _release(self, key, flight):
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+
+    def stream(self, key, make_stream):
+        """
+        Stream tokens for key, sharing one upstream stream between concurrent callers
+
+        The upstream stream is drained by a background thread, so a slow or
+        disconnected caller never holds up the others.
+
+        Args:
+            key: Request key (see make_key)
+            make_stream: Callable returning an iterator of tokens
+
+        Yields:
+            Tokens, in order, for every caller
+        """
+        key = ("stream", key)
+        flight, is_leader = self._join(key)
+
+        if is_leader:
+            def pump():
+                try:
+                    for token in make_stream():
+                        flight.push(token)
+                    flight.finish()
+                except Exception as e:
+                    flight.finish(error=e)
+                finally:
+                    self._release(key, flight)
+                    if flight.waiters > 1:
+                        logger.info(f"Coalesced stream served {flight.waiters} requests")
+
+            threading.Thread(target=pump, daemon=True, name="single-flight").start()
+
+        return flight.read()
+
+    def call(self, key, fn):
+        """Run fn once for all concurrent callers with the same key and share its result"""
+        key = ("call", key)
+        flight, is_leader = self._join(key)
+
+        if is_leader:
+            try:
+                flight.finish(result=fn())
+            except Exception as e:
+                flight.finish(error=e)
+            finally:
+                self._release(key, flight)
+
+        with flight.condition:
+            while not flight.done:
+                flight.condition.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.result
+
+    def get_stats(self):
+        """Upstream calls vs. requests served from a shared call"""
+        return {
+            'in_flight': len(self.flights),
+            'upstream_calls': self.leaders,
+            'coalesced_requests': self.followers
+        }
+
+
+# Shared by every chatbot instance (i.e. every Streamlit session) in the process
+shared_single_flight = SingleFlight()
@@ -0,0 +1,118 @@
+"""
+reranker.py
+Cross-Encoder Re-Ranking - Re-scores a wide candidate set with a latency budget
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Every skipped request shrinks the cost estimate, so one slow measurement
+# (warm-up, GC pause, CPU contention) can't switch re-ranking off for good:
+# after a few skips the next request re-ranks and measures again
+SKIP_DECAY = 0.8
+WARMUP_PAIRS = 10
+
+
+class CrossEncoderReranker:
+    """Small CPU cross-encoder that keeps the best top-k of a candidate set"""
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+                 latency_budget_ms: float = 150.0, device: str = "cpu",
+                 max_length: int = 256):
+        """
+        Args:
+            model_name: sentence-transformers CrossEncoder model
+            latency_budget_ms: Hard budget for retrieval + re-ranking; re-ranking
+                               is skipped when it is not expected to fit
+            device: Torch device for the model
+            max_length: Token limit per (question, chunk) pair
+        """
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model_name, device=device, max_length=max_length)
+        self.model_name = model_name
+        self.latency_budget_ms = latency_budget_ms
+
+        # Running estimate of cost per pair, used to predict whether we fit
+        self.ms_per_pair = None
+        self.skipped = 0
+        self.reranked = 0
+
+        # Warm up with chunk-sized pairs so the first real request has a realistic
+        # estimate; the first pass pays one-off setup costs, the second is timed
+        passage = " ".join(["automation"] * max_length)
+        pairs = [("How does the chatbot integrate with my CRM?", passage)] * WARMUP_PAIRS
+        self.model.predict(pairs[:2], batch_size=2)
+        start = time.perf_counter()
+        self.model.predict(pairs, batch_size=WARMUP_PAIRS)
+        self.ms_per_pair = (time.perf_counter() - start) * 1000 / WARMUP_PAIRS
+
+        logger.info(f"✓ Re-ranker loaded: {model_name} (budget {latency_budget_ms:.0f} ms)")
+
+    def predict_ms(self, num_pairs: int) -> float:
+        """Expected re-ranking time for num_pairs (0 until first measurement)"""
+        return (self.ms_per_pair or 0.0) * num_pairs
+
+    def rerank(self, question: str, results: dict, top_k: int = 3,
+               elapsed_ms: float = 0.0) -> dict:
+        """
+        Re-rank Chroma-style results for one question
+
+        Args:
+            question: User's question
+            results: Result dict from a retriever's query() (nested per query)
+            top_k: Number of chunks to keep
+            elapsed_ms: Time already spent on this retrieval
+
+        Returns:
+            Results trimmed to top_k, with 'reranked' and 'timings' entries
+        """
+        documents = results['documents'][0]
+        timings = dict(results.get('timings', {}))
+
+        remaining_ms = self.latency_budget_ms - elapsed_ms
+        if len(documents) <= 1 or self.predict_ms(len(documents)) > remaining_ms:
+            self.skipped += 1
+            if len(documents) > 1 and self.ms_per_pair:
+                self.ms_per_pair *= SKIP_DECAY
+            return self._trim(results, list(range(min(top_k, len(documents)))), None,
+                              timings, reranked=False)
+
+        start = time.perf_counter()
+        scores = self.model.predict([(question, doc) for doc in documents],
+                                    batch_size=len(documents))
+        rerank_ms = (time.perf_counter() - start) * 1000
+
+        # Exponential moving average of per-pair cost
+        per_pair = rerank_ms / len(documents)
+        self.ms_per_pair = per_pair if self.ms_per_pair is None else 0.8 * self.ms_per_pair + 0.2 * per_pair
+        self.reranked += 1
+
+        order = sorted(range(len(documents)), key=lambda i: float(scores[i]), reverse=True)[:top_k]
+        timings['rerank_ms'] = rerank_ms
+        return self._trim(results, order, [float(scores[i]) for i in order], timings, reranked=True)
+
+    @staticmethod
+    def _trim(results, order, scores, timings, reranked):
+        """Reorder/trim every per-chunk list of a result dict"""
+        trimmed = {}
+        for key, value in results.items():
+            if isinstance(value, list) and value and isinstance(value[0], list):
+                trimmed[key] = [[value[0][i] for i in order]]
+            else:
+                trimmed[key] = value
+        if scores is not None:
+            trimmed['rerank_scores'] = [scores]
+        trimmed['timings'] = timings
+        trimmed['reranked'] = reranked
+        return trimmed
+
+    def get_stats(self):
+        """Re-ranking counters"""
+        return {
+            'reranked': self.reranked,
+            'skipped': self.skipped,
+            'ms_per_pair': self.ms_per_pair
+        }
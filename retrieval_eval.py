@@ -0,0 +1,200 @@
+"""
+retrieval_eval.py
+Retrieval Evaluation - Builds the knowledge base under a grid of chunking/embedding/index
+configs and reports recall@k, MRR, build time, index size and query latency per config
+
+    python retrieval_eval.py --chunkers recursive:1000:200 markdown:256 -k 1 3 5 --output eval.json
+"""
+
+import argparse
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import chromadb
+import numpy as np
+
+from chunks_dataset import chunk_markdown_files
+from Vector_dataset import INDEX_PROFILES, VectorDBStore, load_embedding_function
+
+try:
+    from hybrid_retriever import HybridRetriever
+    HYBRID_AVAILABLE = True
+except Exception:
+    HYBRID_AVAILABLE = False
+
+
+DEFAULT_CHUNKERS = ["recursive:500:100", "recursive:1000:200", "recursive:1500:300", "markdown:128", "markdown:256"]
+
+
+def parse_chunker(spec):
+    """'recursive:<chunk_size>:<overlap>' or 'markdown:<max_tokens>' -> chunk_markdown_files options"""
+    kind, *numbers = spec.split(":")
+    if kind == "recursive" and len(numbers) == 2:
+        return {'splitter': "recursive", 'chunk_size': int(numbers[0]), 'chunk_overlap': int(numbers[1])}
+    if kind == "markdown" and len(numbers) == 1:
+        return {'splitter': "markdown", 'max_tokens': int(numbers[0])}
+    raise ValueError(f"Bad chunker '{spec}' (use recursive:SIZE:OVERLAP or markdown:TOKENS)")
+
+
+def load_eval_set(path):
+    """[{'question', 'expected_sources'}, ...]"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def directory_size(path):
+    """Bytes on disk under a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def score_ranking(retrieved_sources, expected_sources, ks):
+    """Hit@k for each k (any expected source in the top k) and reciprocal rank"""
+    expected = set(expected_sources)
+    first_hit = next((rank for rank, s in enumerate(retrieved_sources, 1) if s in expected), None)
+    hits = {k: first_hit is not None and first_hit <= k for k in ks}
+    return hits, (1.0 / first_hit if first_hit else 0.0)
+
+
+def release_client(client):
+    """Stop a scratch PersistentClient so its files are closed before removal"""
+    system = getattr(client, '_system', None)
+    if system is not None:
+        system.stop()
+    # Chroma caches one system per path; drop it so the path can be reused
+    cache = getattr(type(client), '_identifer_to_system', None)
+    if cache is not None:
+        cache.pop(getattr(client, '_identifier', None), None)
+
+
+def evaluate_config(chunks, eval_set, embedding_function, model_name, profile, retriever, ks):
+    """Build one index in a scratch directory and score it"""
+    scratch = tempfile.mkdtemp(prefix="flowbotics_eval_")
+    client = None
+    search = None
+    try:
+        client = chromadb.PersistentClient(path=scratch)
+        start = time.perf_counter()
+        vectordb = VectorDBStore(
+            persist_directory=scratch,
+            collection_name="eval",
+            client=client,
+            embedding_function=embedding_function,
+            index_profile=profile
+        )
+        vectordb.store_chunks(chunks)
+        build_s = time.perf_counter() - start
+        index_bytes = directory_size(scratch)
+
+        search = HybridRetriever(vectordb, candidates=max(ks)) if retriever == "hybrid" else vectordb
+
+        max_k = max(ks)
+        latencies = []
+        hits = {k: 0 for k in ks}
+        reciprocal_ranks = []
+        misses = []
+
+        for item in eval_set:
+            start = time.perf_counter()
+            results = search.query(item['question'], n_results=max_k)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+            sources = [m['source'] for m in results['metadatas'][0]]
+            item_hits, rr = score_ranking(sources, item['expected_sources'], ks)
+            for k, hit in item_hits.items():
+                hits[k] += hit
+            reciprocal_ranks.append(rr)
+            if rr == 0.0:
+                misses.append({'question': item['question'], 'retrieved': sources})
+
+        n = len(eval_set)
+        result = {
+            'model': model_name,
+            'profile': profile,
+            'retriever': retriever,
+            'num_chunks': len(chunks),
+            'build_s': round(build_s, 3),
+            'index_mb': round(index_bytes / (1024 * 1024), 3),
+            f'mrr@{max_k}': round(float(np.mean(reciprocal_ranks)), 4),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+            'misses': misses
+        }
+        for k in ks:
+            result[f'recall@{k}'] = round(hits[k] / n, 4)
+        return result
+    finally:
+        if retriever == "hybrid" and search is not None:
+            search.close()
+        if client is not None:
+            release_client(client)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality/latency grid over chunking and index configs")
+    parser.add_argument("--dataset", default="./chatbot_dataset")
+    parser.add_argument("--eval-set", default="./retrieval_eval_set.json")
+    parser.add_argument("--chunkers", nargs="+", default=DEFAULT_CHUNKERS,
+                        help="recursive:SIZE:OVERLAP and/or markdown:TOKENS")
+    parser.add_argument("--models", nargs="+", default=["all-MiniLM-L6-v2"],
+                        help="sentence-transformers embedding models")
+    parser.add_argument("--profiles", nargs="+", default=["default"], choices=list(INDEX_PROFILES))
+    parser.add_argument("--retrievers", nargs="+", default=["vector"], choices=["vector", "hybrid"])
+    parser.add_argument("-k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    if "hybrid" in args.retrievers and not HYBRID_AVAILABLE:
+        parser.error("hybrid retrieval is not available in this environment")
+
+    print("="*80)
+    print("RETRIEVAL EVALUATION")
+    print("="*80 + "\n")
+
+    eval_set = load_eval_set(args.eval_set)
+    ks = sorted(set(args.k))
+    print(f"✓ {len(eval_set)} labelled questions from {args.eval_set}")
+
+    # Chunk once per chunker and embed once per model; both are reused across the grid
+    chunk_sets = {}
+    for spec in args.chunkers:
+        chunk_sets[spec] = chunk_markdown_files(args.dataset, **parse_chunker(spec))
+    embedders = {model: load_embedding_function(model) for model in args.models}
+
+    results = []
+    grid = itertools.product(args.chunkers, args.models, args.profiles, args.retrievers)
+    for spec, model, profile, retriever in grid:
+        print(f"\n▶ {spec} | {model} | {profile} | {retriever}")
+        result = evaluate_config(chunk_sets[spec], eval_set, embedders[model], model, profile, retriever, ks)
+        result['chunker'] = spec
+        results.append(result)
+
+    max_k = max(ks)
+    header = f"{'Chunker':<22}{'Model':<20}{'Profile':<10}{'Retr.':<8}"
+    header += "".join(f"{'R@' + str(k):>7}" for k in ks)
+    header += f"{'MRR':>7}{'Chunks':>8}{'Build s':>9}{'MB':>8}{'p50 ms':>9}{'p95 ms':>9}"
+    print("\n" + header)
+    print("-"*len(header))
+    for r in results:
+        line = f"{r['chunker']:<22}{r['model'][:19]:<20}{r['profile']:<10}{r['retriever']:<8}"
+        line += "".join(f"{r[f'recall@{k}']:>7.3f}" for k in ks)
+        line += (f"{r[f'mrr@{max_k}']:>7.3f}{r['num_chunks']:>8}{r['build_s']:>9.2f}"
+                 f"{r['index_mb']:>8.2f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}")
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✓ Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -501,7 +501,9 @@ def initialize_chatbot(api_key):
         chatbot = FlowboticsChatbotOptimized(
             api_key=api_key,
             model_name="llama-3.3-70b-versatile",
-            enable_rlhf=True
+            enable_rlhf=True,
+            metrics_port=int(os.environ.get("FLOWBOTICS_METRICS_PORT", 0)) or None,
+            metrics_host=os.environ.get("FLOWBOTICS_METRICS_HOST", "127.0.0.1")
         )
         return chatbot, True, None
     except Exception as e:
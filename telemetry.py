@@ -0,0 +1,282 @@
+"""
+telemetry.py
+Telemetry - Per-turn spans, counters and histograms in an in-process registry,
+exposed in Prometheus text format
+
+    with telemetry.span("retrieval"):
+        ...
+    telemetry.serve_metrics(9100)     # GET http://127.0.0.1:9100/metrics
+                                      # GET /traces: last 200 turns (spans, tokens)
+                                      # POST /profile?requests=N arms profiler.py
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# One JSON line per finished turn; route or silence it through logging config
+trace_logger = logging.getLogger("flowbotics.trace")
+trace_logger.setLevel(logging.INFO)
+
+
+# Latency buckets (seconds): sub-millisecond prompt builds up to multi-second LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRIC_HELP = {
+    'flowbotics_stage_seconds': ('histogram', "Duration of one pipeline stage"),
+    'flowbotics_turns_total': ('counter', "Chat turns by path (llm, intent, error)"),
+    'flowbotics_llm_requests_total': ('counter', "LLM API requests by model"),
+    'flowbotics_llm_errors_total': ('counter', "Failed LLM API requests by model"),
+    'flowbotics_llm_tokens_total': ('counter', "LLM tokens by model and type (prompt, completion)"),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters and histograms keyed by name + labels"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.counters = {}       # name -> {label key: value}
+        self.histograms = {}     # name -> {label key: [bucket counts..., sum, count]}
+
+    def inc(self, name, value=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def snapshot(self):
+        """Plain-dict copy: counters and histogram count/sum per series"""
+        with self.lock:
+            return {
+                'counters': {
+                    name: {_format_labels(k) or "{}": v for k, v in series.items()}
+                    for name, series in self.counters.items()
+                },
+                'histograms': {
+                    name: {_format_labels(k) or "{}": {'count': s[-1], 'sum': s[-2]}
+                           for k, s in series.items()}
+                    for name, series in self.histograms.items()
+                }
+            }
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                kind, help_text = METRIC_HELP.get(name, ('counter', name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+                for key, value in sorted(series.items()):
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name, series in sorted(self.histograms.items()):
+                kind, help_text = METRIC_HELP.get(name, ('histogram', name))
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+                for key, state in sorted(series.items()):
+                    for bound, bucket_count in zip(self.buckets, state):
+                        lines.append(f"{name}_bucket{_format_labels(key, [('le', repr(bound))])} {bucket_count}")
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {state[-1]}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {state[-2]}")
+                    lines.append(f"{name}_count{_format_labels(key)} {state[-1]}")
+        return "\n".join(lines) + "\n"
+
+
+class Trace:
+    """Spans and token counts for one chat turn"""
+
+    def __init__(self, name="turn", **attributes):
+        self.name = name
+        self.attributes = attributes
+        self.started = time.perf_counter()
+        self.spans = []
+        self.timings = {}     # '<span>_ms' -> milliseconds (summed if a span repeats)
+        self.tokens = {'prompt': 0, 'completion': 0}
+
+    def add_span(self, name, start, duration):
+        ms = duration * 1000
+        self.spans.append({
+            'name': name,
+            'start_ms': round((start - self.started) * 1000, 3),
+            'duration_ms': round(ms, 3)
+        })
+        self.timings[f"{name}_ms"] = self.timings.get(f"{name}_ms", 0.0) + ms
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'attributes': self.attributes,
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'spans': list(self.spans),
+            'tokens': dict(self.tokens)
+        }
+
+
+# Process-wide registry (one per Streamlit process) and the calling thread's trace
+metrics = MetricsRegistry()
+_local = threading.local()
+
+# Most recent finished turns, served at GET /traces
+recent_traces = deque(maxlen=200)
+
+
+def start_trace(name="turn", **attributes):
+    """Begin a trace for the current thread's turn; spans recorded on this thread join it"""
+    trace = Trace(name, **attributes)
+    _local.trace = trace
+    return trace
+
+
+def current_trace():
+    return getattr(_local, 'trace', None)
+
+
+def finish_trace(trace, **attributes):
+    """Emit a finished turn: one structured log line plus the /traces ring buffer"""
+    if trace is None:
+        return None
+    trace.attributes.update(attributes)
+    record = trace.to_dict()
+    recent_traces.append(record)
+    trace_logger.info(json.dumps(record, default=str))
+    return record
+
+
+@contextmanager
+def use_trace(trace):
+    """Make `trace` the current thread's trace for a block (e.g. work handed to a worker thread)"""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def record_span(name, start, duration, trace=None):
+    """Record an already-measured span (start from time.perf_counter)"""
+    metrics.observe('flowbotics_stage_seconds', duration, stage=name)
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.add_span(name, start, duration)
+
+
+@contextmanager
+def span(name):
+    """Time a block into the stage histogram and the current thread's trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, start, time.perf_counter() - start)
+
+
+def record_tokens(model, prompt_tokens, completion_tokens, trace=None):
+    """Token usage of one LLM request"""
+    metrics.inc('flowbotics_llm_tokens_total', prompt_tokens, model=model, type="prompt")
+    metrics.inc('flowbotics_llm_tokens_total', completion_tokens, model=model, type="completion")
+    trace = trace or current_trace()
+    if trace is not None:
+        trace.tokens['prompt'] += prompt_tokens
+        trace.tokens['completion'] += completion_tokens
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, body, content_type='text/plain; charset=utf-8'):
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if path == "/traces":
+            self._reply(json.dumps(list(recent_traces), default=str), 'application/json')
+            return
+        if path not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        self._reply(metrics.render(), 'text/plain; version=0.0.4; charset=utf-8')
+
+    def do_POST(self):
+        """POST /profile?requests=N or ?seconds=N[&mode=cprofile] arms the runtime profiler"""
+        url = urlsplit(self.path)
+        if url.path != "/profile":
+            self.send_error(404)
+            return
+        from profiler import runtime_profiler
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            message = runtime_profiler.arm(params.get('requests'), params.get('seconds'),
+                                           mode=params.get('mode', "sample"))
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        self._reply(message + "\n")
+
+
+_servers = {}
+_servers_lock = threading.Lock()
+
+
+def serve_metrics(port=9100, host="127.0.0.1"):
+    """
+    Start the /metrics endpoint once per process and port (Streamlit re-runs are safe)
+
+    Binds to localhost by default; pass host="0.0.0.0" to expose it to scrapers
+    on other machines.
+
+    Raises:
+        OSError: if the port cannot be bound (e.g. another worker holds it)
+    """
+    with _servers_lock:
+        server = _servers.get(port)
+        if server is None:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, daemon=True, name="metrics").start()
+            _servers[port] = server
+            logger.info(f"✓ Metrics endpoint on http://{host}:{server.server_address[1]}/metrics")
+        return server
@@ -0,0 +1,211 @@
+"""
+tenant_store.py
+Multi-Tenant Vector Storage - One process, many client bots, one embedding model
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from chromadb.config import Settings
+
+from Vector_dataset import VectorDBStore, get_client, load_embedding_function
+
+
+# Rough per-vector cost of a loaded HNSW index: float32 vector + graph links
+EMBEDDING_DIM = 384
+HNSW_M = 16
+
+
+def estimate_index_bytes(count, dim=EMBEDDING_DIM, m=HNSW_M):
+    """Approximate resident memory of an HNSW index holding `count` vectors"""
+    return count * (dim * 4 + m * 2 * 4 + 64)
+
+
+class TenantVectorStore:
+    """
+    Maps tenant id -> collection, with lazily opened, LRU-evicted handles
+
+    Tenants are created explicitly (create_tenant); get() only opens
+    existing collections, so a typo'd tenant id never creates an empty one.
+
+    Evicting a tenant only drops its Python handle. HNSW index memory is
+    owned by Chroma's segment cache, which enforces memory_budget_mb itself
+    through the LRU settings - provided this store opens the path first.
+    """
+
+    def __init__(
+        self,
+        persist_directory: str = "./chroma_db",
+        memory_budget_mb: int = 512,
+        max_open_tenants: int = 32,
+        tenant_collections: dict = None
+    ):
+        """
+        Initialize tenant-aware store
+
+        Args:
+            persist_directory: ChromaDB storage path shared by all tenants
+            memory_budget_mb: Budget for loaded HNSW indexes across tenants (applied by
+                              Chroma's LRU segment cache and used to cap open handles)
+            max_open_tenants: Maximum number of open collection handles
+            tenant_collections: Optional explicit tenant id -> collection name map
+        """
+        self.persist_directory = persist_directory
+        self.memory_budget_bytes = memory_budget_mb * 1024 * 1024
+        self.max_open_tenants = max_open_tenants
+        self.tenant_collections = dict(tenant_collections or {})
+
+        # Let Chroma unload least-recently-used HNSW segments past the budget.
+        # The client is shared with every VectorDBStore on this path (the
+        # settings only apply if the tenant store opens the path first).
+        self.client = get_client(
+            persist_directory,
+            settings=Settings(
+                chroma_segment_cache_policy="LRU",
+                chroma_memory_limit_bytes=self.memory_budget_bytes
+            )
+        )
+
+        # One embedding model for every tenant
+        self.embedding_function = load_embedding_function()
+
+        self.stores = OrderedDict()   # tenant_id -> VectorDBStore
+        self.sizes = {}               # tenant_id -> estimated index bytes
+        self.lock = threading.Lock()
+        self.evictions = 0
+
+        print(f"✓ Tenant store initialized: {persist_directory}")
+        print(f"✓ Memory budget: {memory_budget_mb} MB, max open tenants: {max_open_tenants}")
+
+    def collection_for(self, tenant_id: str) -> str:
+        """Collection name for a tenant (explicit mapping or derived name)"""
+        if tenant_id in self.tenant_collections:
+            return self.tenant_collections[tenant_id]
+
+        # Chroma names: 3-63 chars of [a-zA-Z0-9._-], alphanumeric at both ends
+        name = re.sub(r"[^a-zA-Z0-9._-]", "_", str(tenant_id))
+        return f"tenant_{name}"[:63].rstrip("._-")
+
+    def _open(self, tenant_id, create, index_profile="default"):
+        """Open (or create) a tenant's store and register its handle; caller holds the lock"""
+        store = VectorDBStore(
+            persist_directory=self.persist_directory,
+            collection_name=self.collection_for(tenant_id),
+            client=self.client,
+            embedding_function=self.embedding_function,
+            index_profile=index_profile,
+            create=create
+        )
+        self.stores[tenant_id] = store
+        self.sizes[tenant_id] = estimate_index_bytes(store.collection.count())
+        self._evict()
+        return store
+
+    def get(self, tenant_id: str) -> VectorDBStore:
+        """
+        Get (lazily opening) the VectorDBStore for an existing tenant
+
+        Raises:
+            KeyError: if the tenant has no collection (see create_tenant)
+        """
+        with self.lock:
+            if tenant_id in self.stores:
+                self.stores.move_to_end(tenant_id)
+                return self.stores[tenant_id]
+
+            try:
+                return self._open(tenant_id, create=False)
+            except Exception as e:
+                raise KeyError(f"Unknown tenant '{tenant_id}' "
+                               f"(no collection '{self.collection_for(tenant_id)}'): {e}") from e
+
+    def create_tenant(self, tenant_id: str, chunks=None, index_profile="default") -> VectorDBStore:
+        """
+        Create a tenant's collection (or open it if it exists) and optionally ingest chunks
+
+        Args:
+            tenant_id: Tenant to provision
+            chunks: Optional chunks from chunk_markdown_files to store
+            index_profile: HNSW profile for the new collection
+        """
+        with self.lock:
+            store = self.stores.get(tenant_id)
+            if store is not None:
+                self.stores.move_to_end(tenant_id)
+            else:
+                store = self._open(tenant_id, create=True, index_profile=index_profile)
+        if chunks:
+            store.store_chunks(chunks, upsert=True)
+            self.refresh_size(tenant_id)
+        print(f"✓ Tenant ready: {tenant_id} -> {store.collection_name}")
+        return store
+
+    def _evict(self):
+        """
+        Drop least-recently-used handles beyond the handle and memory limits
+
+        This frees handles only; Chroma's segment cache unloads the indexes.
+        """
+        while len(self.stores) > 1 and (
+            len(self.stores) > self.max_open_tenants
+            or sum(self.sizes.values()) > self.memory_budget_bytes
+        ):
+            tenant_id, _ = self.stores.popitem(last=False)
+            self.sizes.pop(tenant_id, None)
+            self.evictions += 1
+            print(f"✓ Evicted tenant handle: {tenant_id}")
+
+    def release(self, tenant_id: str):
+        """Explicitly close a tenant's handle"""
+        with self.lock:
+            self.stores.pop(tenant_id, None)
+            self.sizes.pop(tenant_id, None)
+
+    def refresh_size(self, tenant_id: str):
+        """Re-estimate a tenant's index size after ingesting chunks"""
+        with self.lock:
+            if tenant_id in self.stores:
+                count = self.stores[tenant_id].collection.count()
+                self.sizes[tenant_id] = estimate_index_bytes(count)
+                self._evict()
+
+    def get_stats(self):
+        """Open handles and estimated memory usage"""
+        stats = {
+            'open_tenants': list(self.stores.keys()),
+            'estimated_mb': sum(self.sizes.values()) / (1024 * 1024),
+            'budget_mb': self.memory_budget_bytes / (1024 * 1024),
+            'evictions': self.evictions
+        }
+        print(f"📊 Open tenants: {len(stats['open_tenants'])} | "
+              f"~{stats['estimated_mb']:.1f}/{stats['budget_mb']:.0f} MB | "
+              f"Evictions: {stats['evictions']}")
+        return stats
+
+
+if __name__ == "__main__":
+
+    print("="*80)
+    print("MULTI-TENANT VECTOR STORE")
+    print("="*80 + "\n")
+
+    tenants = TenantVectorStore(persist_directory="./chroma_db", max_open_tenants=2)
+
+    # The default bot keeps using the original collection
+    tenants.tenant_collections["flowbotic"] = "chatbot_knowledge"
+
+    tenants.create_tenant("acme")
+    tenants.create_tenant("globex")
+
+    for tenant_id in ["flowbotic", "acme", "globex", "flowbotic"]:
+        store = tenants.get(tenant_id)
+        print(f"  {tenant_id} -> {store.collection_name} ({store.collection.count()} chunks)")
+
+    try:
+        tenants.get("initech")
+    except KeyError as e:
+        print(f"  initech -> {e}")
+
+    print()
+    tenants.get_stats()
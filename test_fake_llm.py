@@ -0,0 +1,146 @@
+"""
+test_fake_llm.py
+Rate limiter and streaming against the fake_llm stub server over real HTTP
+
+    python -m pytest -q test_fake_llm.py
+"""
+
+import json
+import time
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+
+import pytest
+
+from fake_llm import FakeLLMClient, _namespace, start_server
+from rate_limiter import RateLimiter
+
+MODEL = "llama-3.1-8b-instant"
+MESSAGES = [
+    {'role': 'user', 'content': "What does Flowbotic do?"},
+    {'role': 'system', 'content': "Flowbotic builds chatbots for small businesses. "
+                                  "Setup usually takes less than two weeks for a new client."},
+]
+
+
+class HTTPAPIError(Exception):
+    """Non-2xx reply, shaped like the SDK errors (status_code, response.headers)"""
+
+    def __init__(self, error):
+        super().__init__(error.reason)
+        self.status_code = error.code
+        self.response = SimpleNamespace(status_code=error.code, headers=dict(error.headers))
+
+
+class HTTPClient:
+    """Minimal stdlib chat-completions client, so the tests run without the Groq SDK"""
+
+    def __init__(self, base_url):
+        self.url = f"{base_url}/openai/v1/chat/completions"
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model, messages, stream=False, max_tokens=1024, **params):
+        body = json.dumps({'model': model, 'messages': messages, 'stream': stream,
+                           'max_tokens': max_tokens, **params}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            response = urllib.request.urlopen(request, timeout=10)
+        except urllib.error.HTTPError as e:
+            raise HTTPAPIError(e) from None
+        if stream:
+            return self._events(response)
+        with response:
+            return _namespace(json.loads(response.read()))
+
+    @staticmethod
+    def _events(response):
+        with response:
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if not line.startswith("data: "):
+                    continue
+                if line == "data: [DONE]":
+                    return
+                yield _namespace(json.loads(line[len("data: "):]))
+
+
+@pytest.fixture
+def stub():
+    """Start a stub server; yields a function fake -> HTTPClient"""
+    servers = []
+
+    def serve(fake):
+        server, base_url = start_server(fake)
+        servers.append(server)
+        return HTTPClient(base_url)
+
+    yield serve
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_limiter_waits_out_retry_after(stub):
+    # With seed 1 the injected-error sequence fails the first request with a 429 and
+    # passes the second; the stub sends retry-after: 1
+    fake = FakeLLMClient(rate_limit_rate=0.5, seed=1, sleep=False)
+    client = stub(fake)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600000, max_retries=2)
+
+    start = time.monotonic()
+    response = limiter.create(client, model=MODEL, messages=MESSAGES, max_tokens=64)
+    elapsed = time.monotonic() - start
+
+    assert response.choices[0].message.content
+    assert fake.get_stats()['requests'] == 2
+    assert fake.get_stats()['errors'] == 1
+    stats = limiter.get_stats()
+    assert stats['retries'] == 1
+    assert stats['failures'] == 0
+    assert elapsed >= 1.0    # paused for the server's retry-after, not the backoff schedule
+
+
+def test_limiter_gives_up_after_max_retries(stub):
+    fake = FakeLLMClient(rate_limit_rate=1.0, sleep=False)
+    client = stub(fake)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600000, max_retries=0)
+
+    with pytest.raises(HTTPAPIError) as raised:
+        limiter.create(client, model=MODEL, messages=MESSAGES, max_tokens=64)
+
+    assert raised.value.status_code == 429
+    assert limiter.get_stats()['failures'] == 1
+    # The 429's retry-after pauses every later caller too
+    assert limiter.get_stats()['paused_for'] > 0
+
+
+def test_streamed_completion_matches_in_process_client(stub):
+    fake = FakeLLMClient(ttft_ms=5, tokens_per_second=5000)
+    client = stub(fake)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600000)
+
+    chunks = list(limiter.create(client, model=MODEL, messages=MESSAGES, max_tokens=256, stream=True))
+
+    assert len(chunks) > 2
+    assert chunks[-1].choices[0].finish_reason == "stop"
+    assert all(chunk.choices[0].finish_reason is None for chunk in chunks[:-1])
+    streamed = "".join(chunk.choices[0].delta.content for chunk in chunks[:-1])
+
+    # Same request, same seed -> same answer as the in-process client
+    expected = FakeLLMClient(sleep=False).create(MODEL, MESSAGES, max_tokens=256)
+    assert streamed == expected.choices[0].message.content
+    assert "Flowbotic builds chatbots" in streamed or "two weeks" in streamed
+
+
+def test_groq_sdk_against_stub(stub):
+    groq = pytest.importorskip("groq")
+    fake = FakeLLMClient(ttft_ms=5, tokens_per_second=5000)
+    base_url = stub(fake).url.split("/openai/v1")[0]
+    client = groq.Groq(api_key="stub", base_url=base_url, max_retries=0)
+    limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=600000)
+
+    chunks = list(limiter.create(client, model=MODEL, messages=MESSAGES, max_tokens=64, stream=True))
+
+    assert chunks[-1].choices[0].finish_reason == "stop"
+    assert fake.get_stats()['requests'] == 1